@@ -6,9 +6,8 @@ if str(_REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(_REPO_ROOT))
 # -----------------------------------------------------------------------------------------------
 
-from route_finder.data_loader import load_dataset
 from route_finder.ui import main
 
 if __name__ == "__main__":
-    df = load_dataset('./east-java-cities-dataset.xlsx')
-    main(df)
+    # The dataset is loaded (and cached across reruns and sessions) inside main().
+    main()
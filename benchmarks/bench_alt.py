@@ -0,0 +1,68 @@
+"""Nodes settled and latency: dijkstra/ucs vs A* with haversine and ALT heuristics.
+
+    python benchmarks/bench_alt.py --sides 30 60 --queries 200 --landmarks 8
+"""
+from __future__ import annotations
+import argparse
+import random
+import statistics
+import time
+
+from common import DATASET, synthetic_road_network
+
+from route_finder.algorithms import LandmarkIndex, astar, dijkstra, haversine_heuristic, ucs
+from route_finder.csr import CSRGraph
+from route_finder.data_loader import load_dataset
+from route_finder.graph_io import build_network
+
+
+def run(label, graph, coords, queries, landmarks):
+    csr = CSRGraph.from_adjacency(graph)
+    start = time.perf_counter()
+    alt = LandmarkIndex.build(csr, k=landmarks, seed=0)
+    build_time = time.perf_counter() - start
+    engines = {
+        'dijkstra': lambda a, b, stats: dijkstra(graph, a, b, stats=stats),
+        'ucs': lambda a, b, stats: ucs(graph, a, b, stats=stats),
+        'astar-haversine': (lambda h: lambda a, b, stats: astar(graph, a, b, h, stats=stats))(haversine_heuristic(graph, coords)),
+        f'astar-alt(k={len(alt.landmarks)})': lambda a, b, stats: astar(graph, a, b, alt, stats=stats),
+    }
+    print(f'\n{label}: {csr.num_nodes} nodes, {csr.num_arcs} arcs, ALT preprocessing {build_time * 1000:.1f} ms')
+    print(f"{'engine':<22} {'settled/query':>14} {'mean ms':>9} {'p95 ms':>9}")
+    reference = {}
+    for name, engine in engines.items():
+        settled, latencies = [], []
+        for a, b in queries:
+            stats = {}
+            t0 = time.perf_counter()
+            _, cost, _ = engine(a, b, stats)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            settled.append(stats['expanded'])
+            if name != 'ucs':
+                assert abs(reference.setdefault((a, b), cost) - cost) < 1e-6, (name, a, b)
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f'{name:<22} {statistics.mean(settled):>14.1f} {statistics.mean(latencies):>9.3f} {p95:>9.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, nargs='+', default=[30, 60], help='synthetic grid side lengths')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--landmarks', type=int, default=8)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    graph, coords, cities = build_network(load_dataset(DATASET))
+    queries = [tuple(rng.sample(cities, 2)) for _ in range(args.queries)]
+    run('East Java dataset', graph, coords, queries, args.landmarks)
+
+    for side in args.sides:
+        df, coords = synthetic_road_network(side)
+        graph, _, cities = build_network(df)
+        queries = [tuple(rng.sample(cities, 2)) for _ in range(args.queries)]
+        run(f'synthetic grid {side}x{side}', graph, coords, queries, args.landmarks)
+
+
+if __name__ == '__main__':
+    main()
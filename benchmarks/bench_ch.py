@@ -0,0 +1,50 @@
+"""Contraction Hierarchies: preprocessing cost and query throughput vs dijkstra_csr.
+
+    python benchmarks/bench_ch.py --sides 30 60 100 --queries 1000
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from common import synthetic_road_network
+
+from route_finder.algorithms import dijkstra_csr
+from route_finder.algorithms.ch import ContractionHierarchy
+from route_finder.csr import CSRGraph
+
+
+def throughput(engine, queries):
+    start = time.perf_counter()
+    costs = [engine(a, b)[1] for a, b in queries]
+    elapsed = time.perf_counter() - start
+    return len(queries) / elapsed, elapsed / len(queries) * 1000, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, nargs='+', default=[30, 60, 100])
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print(f"{'graph':>10} {'nodes':>7} {'build s':>8} {'shortcuts':>10} "
+          f"{'dijkstra q/s':>13} {'ms/q':>7} {'CH q/s':>9} {'ms/q':>7}")
+    for side in args.sides:
+        df, _ = synthetic_road_network(side)
+        graph = CSRGraph.from_frame(df)
+        queries = [tuple(rng.sample(graph.names, 2)) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(graph)
+        build_time = time.perf_counter() - start
+
+        djk_qps, djk_ms, djk_costs = throughput(lambda a, b: dijkstra_csr(graph, a, b), queries)
+        ch_qps, ch_ms, ch_costs = throughput(hierarchy.query, queries)
+        assert all(abs(x - y) < 1e-6 for x, y in zip(djk_costs, ch_costs))
+        print(f'{side:>4}x{side:<5} {graph.num_nodes:>7} {build_time:>8.2f} {hierarchy.num_shortcuts:>10} '
+              f'{djk_qps:>13.0f} {djk_ms:>7.3f} {ch_qps:>9.0f} {ch_ms:>7.3f}')
+
+
+if __name__ == '__main__':
+    main()
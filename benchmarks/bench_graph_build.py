@@ -0,0 +1,54 @@
+"""Graph construction: df.iterrows() builders vs the column-wise/vectorized ones.
+
+    python benchmarks/bench_graph_build.py --rows 100000 1000000
+"""
+from __future__ import annotations
+import argparse
+
+from common import best_of, synthetic_edge_frame
+
+from route_finder.csr import CSRGraph
+from route_finder.graph_io import build_network
+
+
+def iterrows_network(df):
+    # The builders as they were: extract_graph plus the city_coords and
+    # unique_cities expressions from ui.main.
+    graph = {}
+    for _, row in df.iterrows():
+        origin = row['Origin']
+        destination = row['Destination']
+        distance = row['Distance']
+        if origin not in graph:
+            graph[origin] = []
+        if destination not in graph:
+            graph[destination] = []
+        graph[origin].append((destination, distance))
+        graph[destination].append((origin, distance))
+    city_coords = {row['Origin']: (row['Latitude'], row['Longitude']) for _, row in df.iterrows()}
+    unique_cities = sorted(set(df['Origin'].unique()).union(set(df['Destination'].unique())))
+    return graph, city_coords, unique_cities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip-iterrows', action='store_true', help='skip the slow iterrows baseline')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'iterrows':>11} {'build_network':>14} {'CSR from_frame':>15} {'speedup':>8}")
+    for rows in args.rows:
+        df = synthetic_edge_frame(rows)
+        if args.skip_iterrows:
+            baseline = float('nan')
+        else:
+            baseline = best_of(iterrows_network, df, repeats=1)
+            assert iterrows_network(df) == build_network(df)
+        columnar = best_of(build_network, df, repeats=args.repeats)
+        vectorized = best_of(CSRGraph.from_frame, df, repeats=args.repeats)
+        print(f'{rows:>10} {baseline:>10.3f}s {columnar:>13.3f}s {vectorized:>14.3f}s {baseline / columnar:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
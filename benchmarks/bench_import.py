@@ -0,0 +1,59 @@
+"""Import/startup cost: fresh interpreters importing each entry point.
+
+    python benchmarks/bench_import.py --repeats 10
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from common import DATASET, _REPO_ROOT
+
+HEAVY = ('numpy', 'pandas', 'pyarrow', 'folium', 'streamlit')
+
+# Each statement runs in its own interpreter; the baseline is `pass`.
+STATEMENTS = [
+    ('python', 'pass'),
+    ('import route_finder', 'import route_finder'),
+    ('RouteFinder.from_file + route',
+     f'from route_finder import RouteFinder; RouteFinder.from_file({DATASET!r}).route("Bangkalan", "Malang")'),
+    ('import route_finder.graph_io', 'import route_finder.graph_io'),
+    ('import route_finder.data_loader', 'import route_finder.data_loader'),
+    ('import route_finder.matrix', 'import route_finder.matrix'),
+    ('import route_finder.ui', 'import route_finder.ui'),
+]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run(statement: str):
+    env = dict(os.environ, PYTHONPATH=str(_REPO_ROOT))
+    out = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement, heavy=HEAVY)],
+                         capture_output=True, text=True, check=True, cwd=_REPO_ROOT, env=env).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    # Compile the snapshot first so the headless route measures a warm start.
+    run(STATEMENTS[2][1])
+    print(f"{'entry point':>32} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for label, statement in STATEMENTS:
+        samples = [run(statement) for _ in range(args.repeats)]
+        times = [t * 1e3 for t, _ in samples]
+        print(f'{label:>32} {statistics.median(times):>10.1f} {min(times):>8.1f}  {samples[-1][1]}')
+
+
+if __name__ == '__main__':
+    main()
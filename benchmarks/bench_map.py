@@ -0,0 +1,63 @@
+"""Map rendering: one folium object per edge vs the layered GeoJSON map.
+
+    python benchmarks/bench_map.py --sides 20 50 100
+"""
+from __future__ import annotations
+import argparse
+
+import folium
+
+from common import DATASET, best_of, synthetic_road_network
+
+from route_finder.algorithms import dijkstra
+from route_finder.data_loader import load_dataset
+from route_finder.graph_io import base_layer, build_network, visualize_on_map
+
+
+def per_object_map(df, path, visited_edges, city_coords):
+    # visualize_on_map as it was: a PolyLine per row, a DivIcon per visited
+    # edge and a Marker per city.
+    m = folium.Map(location=[df['Latitude'].mean(), df['Longitude'].mean()], zoom_start=6)
+    for origin, destination in zip(df['Origin'].tolist(), df['Destination'].tolist()):
+        folium.PolyLine([city_coords[origin], city_coords[destination]], color='gray', weight=1.5, opacity=0.5).add_to(m)
+    for origin, destination, step in visited_edges or ():
+        a, b = city_coords[origin], city_coords[destination]
+        folium.PolyLine([a, b], color='blue', weight=2, opacity=0.8).add_to(m)
+        mid_point = [(a[0] + b[0]) / 2, (a[1] + b[1]) / 2]
+        folium.Marker(mid_point, icon=folium.DivIcon(html=f'<div style="font-size: 10pt; color: blue;">{step}</div>')).add_to(m)
+    if path:
+        folium.PolyLine([city_coords[city] for city in path], color='red', weight=4, opacity=0.8).add_to(m)
+    for city, coords in city_coords.items():
+        folium.Marker(location=coords, popup=city).add_to(m)
+    return m
+
+
+def render(make_map, *args, **kwargs):
+    return make_map(*args, **kwargs).get_root().render()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, nargs='+', default=[20, 50, 100])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    networks = [('dataset', load_dataset(DATASET))]
+    networks += [(f'grid {side}x{side}', synthetic_road_network(side)[0]) for side in args.sides]
+
+    print(f"{'network':>14} {'per-object KiB':>15} {'time':>8} {'layered KiB':>12} {'time':>8} {'cached base':>12}")
+    for label, df in networks:
+        graph, city_coords, cities = build_network(df)
+        path, _, visited_edges = dijkstra(graph, cities[0], cities[-1])
+        query = (df, path, visited_edges, city_coords)
+        base = base_layer(df, city_coords)
+        old_size = len(render(per_object_map, *query)) / 1024
+        new_size = len(render(visualize_on_map, *query)) / 1024
+        old_time = best_of(render, per_object_map, *query, repeats=args.repeats)
+        new_time = best_of(render, visualize_on_map, *query, repeats=args.repeats)
+        cached = best_of(lambda: render(visualize_on_map, *query, base=base), repeats=args.repeats)
+        print(f'{label:>14} {old_size:>15.1f} {old_time:>7.3f}s {new_size:>12.1f} {new_time:>7.3f}s {cached:>11.3f}s')
+
+
+if __name__ == '__main__':
+    main()
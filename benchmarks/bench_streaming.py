@@ -0,0 +1,47 @@
+"""Graph construction from a CSV edge list: load_dataset + from_frame vs the chunked stream_graph.
+
+    python benchmarks/bench_streaming.py --side 300 --chunksize 100000
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+
+from common import best_of
+
+from route_finder.benchmark import trace_memory
+from route_finder.csr import CSRGraph
+from route_finder.data_loader import load_dataset, stream_graph
+from route_finder.synthetic import road_network, write_csv
+
+
+def load_whole(path):
+    return CSRGraph.from_frame(load_dataset(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--side', type=int, default=300, help='side x side synthetic road network')
+    parser.add_argument('--chunksize', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'network.csv')
+        start = time.perf_counter()
+        rows = write_csv(path, road_network(args.side, seed=0), decimal_comma=True)
+        print(f'{rows} rows written in {time.perf_counter() - start:.2f}s')
+
+        reference, peak_kb, _ = trace_memory(load_whole, path)
+        print(f"{'loader':>22} {'time':>9} {'peak MiB':>9}")
+        print(f"{'load_dataset+from_frame':>22} {best_of(load_whole, path, repeats=args.repeats):>8.3f}s {peak_kb / 1024:>9.1f}")
+        for chunksize in args.chunksize:
+            (graph, _, _), peak_kb, _ = trace_memory(stream_graph, path, chunksize)
+            assert graph.fingerprint() == reference.fingerprint()
+            elapsed = best_of(stream_graph, path, chunksize, repeats=args.repeats)
+            print(f"{f'stream_graph({chunksize})':>22} {elapsed:>8.3f}s {peak_kb / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Multi-stop tours: matrix time, ordering time and tour cost per solver.
+
+    python benchmarks/bench_tour.py --side 60 --stops 8 12 50 200 400
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from common import synthetic_road_network
+
+from route_finder.csr import CSRGraph
+from route_finder.matrix import distance_matrix
+from route_finder.tour import held_karp, improve_tour, nearest_neighbour, tour_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--side', type=int, default=60)
+    parser.add_argument('--stops', type=int, nargs='+', default=[8, 12, 50, 200, 400])
+    parser.add_argument('--exact-limit', type=int, default=12, help='largest stop count solved with Held-Karp')
+    parser.add_argument('-w', '--workers', type=int, help='matrix worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df, _ = synthetic_road_network(args.side, seed=args.seed)
+    graph = CSRGraph.from_frame(df)
+    rng = random.Random(args.seed)
+
+    print(f"{'stops':>6} {'matrix s':>9} {'solver':>16} {'order s':>9} {'cost':>10} {'vs best':>8}")
+    for count in args.stops:
+        stops = rng.sample(graph.names, count)
+        start = time.perf_counter()
+        matrix = distance_matrix(graph, stops, stops, workers=args.workers)
+        matrix_seconds = time.perf_counter() - start
+        costs = matrix.distances.tolist()
+
+        solvers = {'nearest-neighbour': nearest_neighbour,
+                   '+2-opt/or-opt': lambda c: improve_tour(c, nearest_neighbour(c))}
+        if count <= args.exact_limit:
+            solvers['held-karp'] = held_karp
+        rows = []
+        for name, solver in solvers.items():
+            start = time.perf_counter()
+            order = solver(costs)
+            rows.append((name, time.perf_counter() - start, tour_cost(costs, order)))
+        best = min(cost for _, _, cost in rows)
+        for name, seconds, cost in rows:
+            print(f'{count:>6} {matrix_seconds:>9.2f} {name:>16} {seconds:>9.3f} {cost:>10.1f} '
+                  f'{cost / best - 1:>7.1%}')
+
+
+if __name__ == '__main__':
+    main()
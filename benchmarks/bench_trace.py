@@ -0,0 +1,56 @@
+"""Visited-edge tracing on vs off for the searches that record it.
+
+    python benchmarks/bench_trace.py --sides 30 60 100 --queries 10
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import random
+
+from common import synthetic_road_network
+
+from route_finder.algorithms import astar, dijkstra, dijkstra_csr, haversine_heuristic, ucs, ucs_csr
+from route_finder.benchmark import time_calls, trace_memory
+from route_finder.csr import CSRGraph
+from route_finder.graph_io import build_network
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, nargs='+', default=[30, 60, 100])
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'graph':>10} {'engine':>13} {'traced ms':>10} {'untraced ms':>12} {'speedup':>8} "
+          f"{'traced KiB':>11} {'untraced KiB':>13} {'edges':>8}")
+    for side in args.sides:
+        df, _ = synthetic_road_network(side, seed=args.seed)
+        graph, city_coords, cities = build_network(df)
+        csr = CSRGraph.from_adjacency(graph)
+        heuristic = haversine_heuristic(graph, city_coords)
+        rng = random.Random(args.seed)
+        pairs = [rng.sample(cities, 2) for _ in range(args.queries)]
+        engines = {
+            'dijkstra': lambda a, b, trace: dijkstra(graph, a, b, trace=trace),
+            'ucs': lambda a, b, trace: ucs(graph, a, b, trace=trace),
+            'astar': lambda a, b, trace: astar(graph, a, b, heuristic, trace=trace),
+            'dijkstra_csr': lambda a, b, trace: dijkstra_csr(csr, a, b, trace=trace),
+            'ucs_csr': lambda a, b, trace: ucs_csr(csr, a, b, trace=trace),
+        }
+        for name, engine in engines.items():
+            row = {}
+            for trace in (True, False):
+                cycle = itertools.cycle(pairs)
+                times = time_calls(lambda: engine(*next(cycle), trace), warmup=1, repeats=args.repeats * len(pairs))
+                peaks = [trace_memory(engine, a, b, trace)[1] for a, b in pairs]
+                row[trace] = (sum(times) / len(times), sum(peaks) / len(peaks))
+            edges = sum(len(engine(a, b, True)[2]) for a, b in pairs) // len(pairs)
+            (on_time, on_kb), (off_time, off_kb) = row[True], row[False]
+            print(f'{side}x{side:<6} {name:>13} {on_time * 1e3:>10.2f} {off_time * 1e3:>12.2f} '
+                  f'{on_time / off_time:>7.2f}x {on_kb:>11.1f} {off_kb:>13.1f} {edges:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Check Contraction Hierarchies against dijkstra on every ordered city pair.
+
+    python benchmarks/ch_correctness.py [dataset.xlsx|.csv]
+
+Exits non-zero on the first mismatch. Besides the cost, every unpacked path
+must start and end at the queried cities and only use real roads whose
+lengths add up to the reported cost.
+"""
+from __future__ import annotations
+import sys
+from typing import Tuple
+
+from common import DATASET
+
+from route_finder.algorithms import dijkstra
+from route_finder.algorithms.ch import ContractionHierarchy
+from route_finder.csr import CSRGraph
+from route_finder.data_loader import load_dataset
+from route_finder.graph_io import extract_graph
+
+
+def check(graph) -> Tuple[int, int]:
+    hierarchy = ContractionHierarchy.build(CSRGraph.from_adjacency(graph))
+    pairs = 0
+    for start in graph:
+        for goal in graph:
+            expected_path, expected_cost, _ = dijkstra(graph, start, goal)
+            path, cost, _ = hierarchy.query(start, goal)
+            if cost != expected_cost:
+                raise AssertionError(f'{start} -> {goal}: CH cost {cost}, dijkstra {expected_cost}')
+            if expected_path is None:
+                if path is not None:
+                    raise AssertionError(f'{start} -> {goal}: CH found {path}, dijkstra found no path')
+            else:
+                if path[0] != start or path[-1] != goal:
+                    raise AssertionError(f'{start} -> {goal}: path endpoints {path[0]} -> {path[-1]}')
+                length = 0
+                for u, v in zip(path, path[1:]):
+                    roads = [d for neighbor, d in graph[u] if neighbor == v]
+                    if not roads:
+                        raise AssertionError(f'{start} -> {goal}: {u} -> {v} is not a road')
+                    length += min(roads)
+                if length != cost:
+                    raise AssertionError(f'{start} -> {goal}: path length {length} != cost {cost}')
+            pairs += 1
+    return pairs, hierarchy.num_shortcuts
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DATASET
+    pairs, shortcuts = check(extract_graph(load_dataset(path)))
+    print(f'OK: {pairs} pairs match dijkstra ({shortcuts} shortcuts)')
+
+
+if __name__ == '__main__':
+    main()
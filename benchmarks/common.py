@@ -0,0 +1,51 @@
+from __future__ import annotations
+import sys
+import time
+from pathlib import Path
+
+# Make the local package importable when a benchmark is run as a script.
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+DATASET = str(_REPO_ROOT / 'east-java-cities-dataset.xlsx')
+
+
+def synthetic_edge_frame(rows: int, seed: int = 0):
+    # Random edge list in load_dataset's schema; every city gets one fixed
+    # coordinate that is repeated on each row where it is the Origin.
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    num_cities = max(2, rows // 3)
+    names = np.array([f'City {i:07d}' for i in range(num_cities)], dtype=object)
+    lat = rng.uniform(-8.8, -6.8, num_cities)
+    lon = rng.uniform(111.0, 114.6, num_cities)
+    origins = rng.integers(0, num_cities, rows)
+    destinations = (origins + rng.integers(1, num_cities, rows)) % num_cities
+    return pd.DataFrame({
+        'Origin': names[origins],
+        'Destination': names[destinations],
+        'Distance': rng.integers(5, 150, rows),
+        'Latitude': lat[origins],
+        'Longitude': lon[origins],
+    })
+
+
+def best_of(func, *args, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_road_network(side: int, seed: int = 0, kind: str = 'grid'):
+    # side x side road network from route_finder.synthetic.
+    # Returns (DataFrame in load_dataset's schema, city_coords).
+    from route_finder.synthetic import city_coords, road_network, to_frame
+
+    records = list(road_network(side, kind=kind, seed=seed))
+    return to_frame(records), city_coords(records)
@@ -0,0 +1,145 @@
+"""Load test for the HTTP routing service: p50/p99 latency and requests/s.
+
+    python benchmarks/load_test.py --requests 5000 --concurrency 50
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --requests 5000
+
+Without --url a service is started on a free local port for the duration of
+the run. Queries are drawn from --pairs random city pairs of the bundled
+dataset, so repeats exercise the LRU and request coalescing.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from common import DATASET, _REPO_ROOT
+
+from route_finder import RouteFinder
+from route_finder.benchmark import Measurement
+
+
+async def client(host, port, queue, latencies, statuses):
+    # One keep-alive connection issuing requests back to back.
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, targets, concurrency):
+    queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, queue, latencies, statuses) for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET /stats HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b'\r\n\r\n', 1)[1])
+
+
+def start_service(args):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    command = [sys.executable, '-m', 'route_finder', 'serve', '-g', args.graph, '--port', str(port),
+               '--cache-size', str(args.cache_size), '--executor', args.executor]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    env = dict(os.environ, PYTHONPATH=str(_REPO_ROOT))
+    process = subprocess.Popen(command, cwd=_REPO_ROOT, env=env, stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if 'serving' not in line:
+        process.kill()
+        raise RuntimeError(f'service failed to start: {line}{process.stderr.read()}')
+    # Keep draining the service's log so a full pipe never blocks it.
+    threading.Thread(target=_drain, args=(process.stderr,), daemon=True).start()
+    return process, port
+
+
+def _drain(stream):
+    for _ in stream:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='existing service (default: start one)')
+    parser.add_argument('-g', '--graph', default=DATASET)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--pairs', type=int, default=500, help='random (from, to) pairs to draw from')
+    parser.add_argument('--algorithm', default='dijkstra')
+    parser.add_argument('--cache-size', type=int, default=4096)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--executor', choices=('process', 'thread'), default='process')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cities = list(RouteFinder.from_file(args.graph).cities)
+    pairs = [rng.sample(cities, 2) for _ in range(args.pairs)]
+    targets = ['/route?' + urlencode({'from': a, 'to': b, 'algorithm': args.algorithm})
+               for a, b in (rng.choice(pairs) for _ in range(args.requests))]
+
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, port = start_service(args)
+        host = '127.0.0.1'
+    try:
+        latencies, statuses, elapsed = asyncio.run(run_load(host, port, targets, args.concurrency))
+        stats = asyncio.run(fetch_stats(host, port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latency = Measurement('load', latencies)
+    print(f'{latency.rounds} requests, concurrency {args.concurrency}, {len(set(targets))} distinct pairs, '
+          f'algorithm {args.algorithm}')
+    print(f'  status     {dict(sorted(statuses.items()))}')
+    print(f'  rps        {latency.rounds / elapsed:,.0f}')
+    print(f'  latency    p50 {latency.percentile(50) * 1e3:.2f} ms   p90 {latency.percentile(90) * 1e3:.2f} ms   '
+          f'p99 {latency.percentile(99) * 1e3:.2f} ms   max {latency.max * 1e3:.2f} ms   '
+          f'mean {latency.mean * 1e3:.2f} ms')
+    print(f'  service    {stats}')
+
+
+if __name__ == '__main__':
+    main()
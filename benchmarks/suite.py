@@ -0,0 +1,120 @@
+"""Benchmark every routing engine on the bundled dataset and growing synthetic graphs.
+
+    python benchmarks/suite.py --sides 20 40 60 --queries 20 --repeats 100 --json results.json
+
+For each graph a fixed random set of city pairs is drawn. Every engine is
+warmed up, then timed query by query (cycling through the pairs) without
+tracing. Settled nodes are averaged over all pairs, and peak memory and
+retained blocks come from one separate traced query. --json writes all
+samples so runs can be compared for regressions.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import random
+import statistics
+import subprocess
+import time
+
+from common import DATASET, synthetic_road_network
+
+from route_finder.algorithms import (
+    LandmarkIndex, TreeCache, astar, bidirectional_dijkstra, dijkstra, dijkstra_csr, dijkstra_tree,
+    haversine_heuristic, ucs, ucs_csr,
+)
+from route_finder.algorithms.ch import ContractionHierarchy
+from route_finder.benchmark import Measurement, count_allocations, format_table, time_calls, to_json, trace_memory
+from route_finder.csr import CSRGraph
+from route_finder.data_loader import load_dataset
+from route_finder.graph_io import build_network
+
+
+def engines(graph, city_coords):
+    csr = CSRGraph.from_adjacency(graph)
+    preprocessing = {}
+
+    start = time.perf_counter()
+    heuristic = haversine_heuristic(graph, city_coords)
+    preprocessing['astar_haversine'] = time.perf_counter() - start
+    start = time.perf_counter()
+    landmarks = LandmarkIndex.build(csr, k=8, seed=0)
+    preprocessing['astar_alt'] = time.perf_counter() - start
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(csr)
+    preprocessing['ch'] = time.perf_counter() - start
+    trees = TreeCache(csr, maxsize=1024)
+
+    return {
+        'dijkstra': lambda a, b, stats=None: dijkstra(graph, a, b, stats=stats),
+        'ucs': lambda a, b, stats=None: ucs(graph, a, b, stats=stats),
+        'astar_haversine': lambda a, b, stats=None: astar(graph, a, b, heuristic, stats=stats),
+        'astar_alt': lambda a, b, stats=None: astar(graph, a, b, landmarks, stats=stats),
+        'bidirectional_dijkstra': lambda a, b, stats=None: bidirectional_dijkstra(graph, a, b, stats=stats),
+        'dijkstra_csr': lambda a, b, stats=None: dijkstra_csr(csr, a, b, stats=stats),
+        'ucs_csr': lambda a, b, stats=None: ucs_csr(csr, a, b, stats=stats),
+        'ch': lambda a, b, stats=None: hierarchy.query(a, b, stats=stats),
+        'dijkstra_tree_cached': lambda a, b, stats=None: dijkstra_tree(csr, a, b, trees),
+    }, preprocessing
+
+
+def bench_graph(label, graph, city_coords, args, rng):
+    cities = sorted(graph)
+    pairs = [tuple(rng.sample(cities, 2)) for _ in range(args.queries)]
+    runners, preprocessing = engines(graph, city_coords)
+    measurements = []
+    warmup = max(args.warmup, len(pairs))  # every pair is run at least once before timing
+    for name, engine in runners.items():
+        cycle = itertools.cycle(pairs)
+        times = time_calls(lambda: engine(*next(cycle)), warmup=warmup, repeats=args.repeats)
+        settled = []
+        for a, b in pairs:
+            stats = {}
+            engine(a, b, stats=stats)
+            if 'expanded' in stats:
+                settled.append(stats['expanded'])
+        _, peak_kb, retained = trace_memory(engine, *pairs[0])
+        alloc_blocks, alloc_kb = count_allocations(engine, pairs)
+        measurements.append(Measurement(
+            f'{label}/{name}', times, warmup=warmup,
+            settled=round(statistics.fmean(settled)) if settled else None,
+            peak_kb=peak_kb, retained_blocks=retained, alloc_blocks=alloc_blocks, alloc_kb=alloc_kb,
+            params={'graph': label, 'engine': name, 'nodes': len(graph), 'queries': len(pairs),
+                    'preprocessing_s': preprocessing.get(name)},
+        ))
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, nargs='*', default=[20, 40, 60], help='synthetic grid side lengths')
+    parser.add_argument('--queries', type=int, default=20, help='city pairs per graph')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this JSON file')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    graph, city_coords, _ = build_network(load_dataset(DATASET))
+    measurements = bench_graph('east-java', graph, city_coords, args, rng)
+    for side in args.sides:
+        df, city_coords = synthetic_road_network(side, seed=args.seed)
+        graph, _, _ = build_network(df)
+        measurements += bench_graph(f'grid{side}x{side}', graph, city_coords, args, rng)
+
+    for label in dict.fromkeys(m.params['graph'] for m in measurements):
+        print(f"\n{label}")
+        print(format_table([m for m in measurements if m.params['graph'] == label]))
+
+    if args.json:
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        except OSError:
+            commit = None
+        with open(args.json, 'w') as f:
+            f.write(to_json(measurements, commit=commit, args=vars(args)))
+        print(f'\nwrote {args.json}')
+
+
+if __name__ == '__main__':
+    main()
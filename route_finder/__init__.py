@@ -1 +1,3 @@
-__all__ = ['algorithms']
+from .api import RouteFinder
+
+__all__ = ['RouteFinder', 'algorithms', 'csr']
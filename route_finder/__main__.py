@@ -0,0 +1,29 @@
+from __future__ import annotations
+import importlib
+import sys
+
+# python -m route_finder <command> [args]; each command is a module with its
+# own main(argv), imported only when it is run.
+
+COMMANDS = {
+    'batch': ('route_finder.batch', 'route many (origin, destination) pairs'),
+    'profile': ('route_finder.profiling', 'replay random queries with counters and cProfile'),
+    'serve': ('route_finder.service', 'serve routes over HTTP'),
+    'snapshot': ('route_finder.snapshot', 'compile a dataset into a binary graph snapshot'),
+    'synthetic': ('route_finder.synthetic', 'generate a synthetic road network'),
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        width = max(map(len, COMMANDS))
+        usage = '\n'.join(f'  {name:<{width}}  {help}' for name, (_, help) in COMMANDS.items())
+        print(f'usage: python -m route_finder <command> [args]\n\ncommands:\n{usage}', file=sys.stderr)
+        return 0 if argv and argv[0] in ('-h', '--help') else 2
+    importlib.import_module(COMMANDS[argv[0]][0]).main(argv[1:])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
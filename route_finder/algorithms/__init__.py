@@ -1,2 +1,10 @@
-from .algorithms import dijkstra, ucs
-__all__ = ['dijkstra', 'ucs']
+from .algorithms import dijkstra, dijkstra_csr, shortest_path_tree_csr, ucs, ucs_csr
+from .astar import astar, haversine_heuristic
+from .bidirectional import bidirectional_dijkstra, reverse_adjacency
+from .alt import LandmarkIndex, landmark_index_path
+from .tree import ShortestPathTree, TreeCache, dijkstra_tree
+__all__ = [
+    'LandmarkIndex', 'ShortestPathTree', 'TreeCache', 'astar', 'bidirectional_dijkstra', 'dijkstra', 'dijkstra_csr',
+    'dijkstra_tree', 'haversine_heuristic', 'landmark_index_path', 'reverse_adjacency', 'shortest_path_tree_csr',
+    'ucs', 'ucs_csr',
+]
@@ -1,26 +1,72 @@
 from __future__ import annotations
 import heapq
-from typing import Dict, Hashable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Hashable, List, Tuple
+
+if TYPE_CHECKING:
+    from ..csr import CSRGraph
 
 # Graph type alias aligned with original structure (adjacency list with costs)
 Graph = Dict[Hashable, List[Tuple[Hashable, float]]]
 
-# === Verbatim from user's original code ===
+# Every search takes `trace`: True (the default) returns the relaxed edges
+# as (node, neighbor, step) tuples in visited_edges for the map overlay,
+# False skips that bookkeeping entirely, and a callable is handed each edge
+# tuple as it is relaxed while visited_edges stays empty.
+
+def edge_recorder(trace, visited_edges, names=None):
+    # The per-relaxation hook for a search, or None when tracing is off, so
+    # the hot loop pays one `is not None` test per edge and allocates
+    # nothing. `names` maps the int IDs of the CSR kernels back to cities
+    # for callable observers.
+    if trace is True:
+        return visited_edges.append
+    if not trace:
+        return None
+    if names is None:
+        return trace
+    return lambda edge: trace((names[edge[0]], names[edge[1]], edge[2]))
+
+
+def search_stats(stats: Dict, settled: int, pops: int, queued: int, relaxations: int, goal_popped: bool = False) -> None:
+    # Instrumentation counters of one search, filled in once it ends. Every
+    # heap push is either popped or still queued, and every pop settles a
+    # node, is the goal or is stale, so only pops are counted in the loop;
+    # relaxations (arcs scanned) are summed per settled node, never per arc.
+    stats['expanded'] = stats['settled'] = settled
+    stats['pops'] = pops
+    stats['pushes'] = pops + queued
+    stats['stale_pops'] = pops - settled - (1 if goal_popped else 0)
+    stats['relaxations'] = relaxations
+
 
-def dijkstra(graph, start, goal):
+def _degree_sum(graph, nodes) -> int:
+    return sum(len(graph.get(node, ())) for node in nodes)
+
+
+# === Original dijkstra and ucs ===
+# The search logic (frontier, relaxation and path reconstruction) is the
+# user's original code, quirks included; only the optional `stats` counters
+# and the `trace` hook were threaded through.
+
+def dijkstra(graph, start, goal, stats=None, trace=True):
     djk_distances = {node: float('inf') for node in graph}
     djk_distances[start] = 0
     djk_frontier = [(0, start)]  # Priority queue
     djk_explored = set()
     djk_path = {}
     djk_visited_edges = []
+    record_edge = edge_recorder(trace, djk_visited_edges)
+    pops = 0
 
     step_counter = 1
 
     while djk_frontier:
         dj_current_cost, djk_current_node = heapq.heappop(djk_frontier)
+        pops += 1
 
         if djk_current_node == goal:
+            if stats is not None:
+                search_stats(stats, len(djk_explored), pops, len(djk_frontier), _degree_sum(graph, djk_explored), True)
             djk_path_result = []
             while djk_current_node != start:
                 djk_path_result.append(djk_current_node)
@@ -37,25 +83,33 @@ def dijkstra(graph, start, goal):
                     djk_distances[neighbor] = djk_new_cost
                     heapq.heappush(djk_frontier, (djk_new_cost, neighbor))
                     djk_path[neighbor] = djk_current_node
-                    djk_visited_edges.append((djk_current_node, neighbor, step_counter))
-                    step_counter += 1
+                    if record_edge is not None:
+                        record_edge((djk_current_node, neighbor, step_counter))
+                        step_counter += 1
 
+    if stats is not None:
+        search_stats(stats, len(djk_explored), pops, 0, _degree_sum(graph, djk_explored))
     return None, float('inf'), djk_visited_edges  # No path found
 
 
-def ucs(graph, start, goal):
+def ucs(graph, start, goal, stats=None, trace=True):
     ucs_frontier = []  # Priority queue
     heapq.heappush(ucs_frontier, (0, start))  # Format: (cost, node)
     ucs_explored = set()  # Set of visited nodes
     ucs_path = {}  # Track the ucs_path
     ucs_visited_edges = []
+    record_edge = edge_recorder(trace, ucs_visited_edges)
+    pops = 0
 
     step_counter = 1
 
     while ucs_frontier:
         ucs_current_cost, ucs_current_node = heapq.heappop(ucs_frontier)
+        pops += 1
 
         if ucs_current_node == goal:  # Goal reached
+            if stats is not None:
+                search_stats(stats, len(ucs_explored), pops, len(ucs_frontier), _degree_sum(graph, ucs_explored), True)
             ucs_path_result = []
             ucs_total_cost = 0
 
@@ -79,7 +133,176 @@ def ucs(graph, start, goal):
                     ucs_new_cost = ucs_current_cost + cost  # Add the cost to reach the neighbor
                     heapq.heappush(ucs_frontier, (ucs_new_cost, neighbor))
                     ucs_path[neighbor] = ucs_current_node
-                    ucs_visited_edges.append((ucs_current_node, neighbor, step_counter))
-                    step_counter += 1
+                    if record_edge is not None:
+                        record_edge((ucs_current_node, neighbor, step_counter))
+                        step_counter += 1
 
+    if stats is not None:
+        search_stats(stats, len(ucs_explored), pops, 0, _degree_sum(graph, ucs_explored))
     return None, float('inf'), ucs_visited_edges  # No ucs_path found
+
+
+# === Integer-ID variants for the compact CSRGraph ===
+# Same search order and results as above, but every heap entry, distance and
+# predecessor lookup is keyed by a dense int ID. Names are only mapped back
+# when the result is returned.
+
+def dijkstra_csr(graph: CSRGraph, start, goal, stats=None, trace=True):
+    source = graph.index.get(start)
+    target = graph.index.get(goal)
+    if source is None or target is None:
+        return None, float('inf'), []
+
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    distances = [float('inf')] * graph.num_nodes
+    distances[source] = 0
+    predecessors = [-1] * graph.num_nodes
+    explored = bytearray(graph.num_nodes)
+    frontier = [(0, source)]
+    visited_edges = []
+    record_edge = edge_recorder(trace, visited_edges, graph.names)
+    pops = settled = relaxations = 0
+
+    step_counter = 1
+
+    while frontier:
+        current_cost, current = heapq.heappop(frontier)
+        pops += 1
+
+        if current == target:
+            if stats is not None:
+                search_stats(stats, settled, pops, len(frontier), relaxations, True)
+            return _ids_to_path(graph, predecessors, source, target), current_cost, _ids_to_edges(graph, visited_edges)
+
+        if not explored[current]:
+            explored[current] = 1
+            first, last = offsets[current], offsets[current + 1]
+            settled += 1
+            relaxations += last - first
+            for i in range(first, last):
+                neighbor = targets[i]
+                new_cost = current_cost + weights[i]
+                if new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    heapq.heappush(frontier, (new_cost, neighbor))
+                    predecessors[neighbor] = current
+                    if record_edge is not None:
+                        record_edge((current, neighbor, step_counter))
+                        step_counter += 1
+
+    if stats is not None:
+        search_stats(stats, settled, pops, 0, relaxations)
+    return None, float('inf'), _ids_to_edges(graph, visited_edges)
+
+
+def ucs_csr(graph: CSRGraph, start, goal, stats=None, trace=True):
+    source = graph.index.get(start)
+    target = graph.index.get(goal)
+    if source is None or target is None:
+        return None, float('inf'), []
+
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    predecessors = [-1] * graph.num_nodes
+    explored = bytearray(graph.num_nodes)
+    frontier = [(0, source)]
+    visited_edges = []
+    record_edge = edge_recorder(trace, visited_edges, graph.names)
+    pops = settled = relaxations = 0
+
+    step_counter = 1
+
+    while frontier:
+        current_cost, current = heapq.heappop(frontier)
+        pops += 1
+
+        if current == target:
+            if stats is not None:
+                search_stats(stats, settled, pops, len(frontier), relaxations, True)
+            path = _ids_to_path(graph, predecessors, source, target)
+            # Like ucs(), the reported cost is re-summed along the returned
+            # path using the first matching arc of each hop.
+            total_cost = 0
+            for u, v in zip(path, path[1:]):
+                u_id, v_id = graph.index[u], graph.index[v]
+                for i in range(offsets[u_id], offsets[u_id + 1]):
+                    if targets[i] == v_id:
+                        total_cost += weights[i]
+                        break
+            return path, total_cost, _ids_to_edges(graph, visited_edges)
+
+        if not explored[current]:
+            explored[current] = 1
+            first, last = offsets[current], offsets[current + 1]
+            settled += 1
+            relaxations += last - first
+            for i in range(first, last):
+                neighbor = targets[i]
+                if not explored[neighbor]:
+                    heapq.heappush(frontier, (current_cost + weights[i], neighbor))
+                    predecessors[neighbor] = current
+                    if record_edge is not None:
+                        record_edge((current, neighbor, step_counter))
+                        step_counter += 1
+
+    if stats is not None:
+        search_stats(stats, settled, pops, 0, relaxations)
+    return None, float('inf'), _ids_to_edges(graph, visited_edges)
+
+
+def shortest_path_tree_csr(graph: CSRGraph, source: int) -> Tuple[List[float], List[int]]:
+    # dijkstra_csr without a goal: settles every node reachable from the
+    # source ID and returns the distance and predecessor (-1 = none) arrays.
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    distances = [float('inf')] * graph.num_nodes
+    distances[source] = 0
+    predecessors = [-1] * graph.num_nodes
+    explored = bytearray(graph.num_nodes)
+    frontier = [(0, source)]
+
+    while frontier:
+        current_cost, current = heapq.heappop(frontier)
+        if explored[current]:
+            continue
+        explored[current] = 1
+        for i in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[i]
+            new_cost = current_cost + weights[i]
+            if new_cost < distances[neighbor]:
+                distances[neighbor] = new_cost
+                heapq.heappush(frontier, (new_cost, neighbor))
+                predecessors[neighbor] = current
+
+    return distances, predecessors
+
+
+def tree_is_affected(distances: List[float], changes) -> bool:
+    # Whether the arc changes (version, u, v, old, new; inf = no arc) can
+    # alter the shortest-path tree behind `distances`. A cheaper arc matters
+    # once it reaches v for no more than v's distance; a dearer or removed
+    # arc only if it was tight, i.e. on a shortest path to v. Otherwise a
+    # fresh search would settle the same tree in the same order.
+    inf = float('inf')
+    for _, u, v, old, new in changes:
+        du = distances[u]
+        if du == inf:
+            continue
+        if new < old:
+            if du + new <= distances[v]:
+                return True
+        elif new > old and du + old == distances[v]:
+            return True
+    return False
+
+
+def _ids_to_path(graph: CSRGraph, predecessors: List[int], source: int, target: int) -> List[Hashable]:
+    node_ids = [target]
+    while node_ids[-1] != source:
+        node_ids.append(predecessors[node_ids[-1]])
+    node_ids.reverse()
+    names = graph.names
+    return [names[i] for i in node_ids]
+
+
+def _ids_to_edges(graph: CSRGraph, edges: List[Tuple[int, int, int]]) -> List[Tuple[Hashable, Hashable, int]]:
+    names = graph.names
+    return [(names[u], names[v], step) for u, v, step in edges]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import math
+import random
+import struct
+from array import array
+from typing import Hashable, List, Optional, Sequence
+
+from ..csr import CSRGraph
+from .algorithms import shortest_path_tree_csr, tree_is_affected
+
+# ALT (A*, Landmarks, Triangle inequality) preprocessing.
+#
+# For a landmark L, d(L, t) <= d(L, v) + d(v, t) and d(v, L) <= d(v, t) + d(t, L),
+# so max(d(L, t) - d(L, v), d(v, L) - d(t, L)) is a lower bound on d(v, t).
+# The index stores d(L, .) and, for directed graphs, d(., L) for K landmarks
+# and is passed to astar() as its heuristic.
+
+MAGIC = b'EJRFALT1'
+_HEADER = struct.Struct('=8sIIQ32s')  # magic, landmark count, directed, node count, graph fingerprint
+INDEX_SUFFIX = '.alt.bin'
+
+
+class LandmarkIndex:
+    def __init__(self, graph: CSRGraph, landmarks: Sequence[int], from_landmark: List[array],
+                 to_landmark: Optional[List[array]] = None):
+        self.graph = graph
+        self.landmarks = list(landmarks)
+        self.from_landmark = from_landmark
+        # Undirected graphs: the distance to a landmark equals the distance from it.
+        self.to_landmark = from_landmark if to_landmark is None else to_landmark
+        self.version = graph.version
+        self._goal = None
+
+    @classmethod
+    def build(cls, graph: CSRGraph, k: int = 8, strategy: str = 'farthest', seed: Optional[int] = None) -> 'LandmarkIndex':
+        if strategy not in ('farthest', 'random'):
+            raise ValueError(f"unknown landmark strategy {strategy!r}, expected 'farthest' or 'random'")
+        k = min(k, graph.num_nodes)
+        rng = random.Random(seed)
+        reverse = graph.reverse() if graph.directed else None
+
+        landmarks: List[int] = []
+        from_landmark: List[array] = []
+        if strategy == 'random':
+            landmarks = rng.sample(range(graph.num_nodes), k)
+            from_landmark = [array('d', shortest_path_tree_csr(graph, landmark)[0]) for landmark in landmarks]
+        elif k:
+            # Farthest-point selection: start from the node farthest from a random
+            # seed node, then repeatedly add the node whose closest landmark is
+            # farthest away. Unreachable nodes are skipped.
+            seed_distances = shortest_path_tree_csr(graph, rng.randrange(graph.num_nodes))[0]
+            closest = [math.inf] * graph.num_nodes
+            candidate = _argmax_finite(seed_distances)
+            while len(landmarks) < k and candidate is not None:
+                distances = shortest_path_tree_csr(graph, candidate)[0]
+                landmarks.append(candidate)
+                from_landmark.append(array('d', distances))
+                closest = [min(c, d) for c, d in zip(closest, distances)]
+                candidate = _argmax_finite(closest)
+                if candidate is not None and closest[candidate] == 0:
+                    candidate = None
+
+        to_landmark = None
+        if reverse is not None:
+            to_landmark = [array('d', shortest_path_tree_csr(reverse, landmark)[0]) for landmark in landmarks]
+        return cls(graph, landmarks, from_landmark, to_landmark)
+
+    def __call__(self, node: Hashable, goal: Hashable) -> float:
+        # Heuristic signature expected by astar(): names in, lower bound out.
+        # The goal's landmark distances are looked up once per goal.
+        if self.version != self.graph.version:
+            self.refresh()
+        index = self.graph.index
+        cached = self._goal
+        if cached is None or cached[0] != goal:
+            goal_id = index.get(goal)
+            if goal_id is None:
+                return 0.0
+            cached = (goal, [l[goal_id] for l in self.from_landmark], [l[goal_id] for l in self.to_landmark])
+            self._goal = cached
+        node_id = index.get(node)
+        if node_id is None:
+            return 0.0
+        _, from_goal, to_goal = cached
+        bound = 0.0
+        for l_goal, goal_l, from_l, to_l in zip(from_goal, to_goal, self.from_landmark, self.to_landmark):
+            l_node, node_l = from_l[node_id], to_l[node_id]
+            if l_goal != math.inf and l_node != math.inf and l_goal - l_node > bound:
+                bound = l_goal - l_node
+            if node_l != math.inf and goal_l != math.inf and node_l - goal_l > bound:
+                bound = node_l - goal_l
+        return bound
+
+    def refresh(self) -> int:
+        # Catch up with in-place graph changes by recomputing only the
+        # landmark rows the changes can affect. Returns the number of rows
+        # recomputed; stale rows would no longer be valid lower bounds.
+        graph = self.graph
+        changes = graph.changes_since(self.version)
+        directed = self.to_landmark is not self.from_landmark
+        recomputed = 0
+        reverse = None
+        for i, landmark in enumerate(self.landmarks):
+            if tree_is_affected(self.from_landmark[i], changes):
+                self.from_landmark[i] = array('d', shortest_path_tree_csr(graph, landmark)[0])
+                recomputed += 1
+            # d(., L) is a tree on the reverse graph, where u -> v reads v -> u.
+            if directed and tree_is_affected(self.to_landmark[i], [(c[0], c[2], c[1], c[3], c[4]) for c in changes]):
+                reverse = reverse or graph.reverse()
+                self.to_landmark[i] = array('d', shortest_path_tree_csr(reverse, landmark)[0])
+                recomputed += 1
+        self.version = graph.version
+        self._goal = None
+        return recomputed
+
+    # --- persistence -------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        directed = self.to_landmark is not self.from_landmark
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, len(self.landmarks), int(directed), self.graph.num_nodes, self.graph.fingerprint()))
+            array('q', self.landmarks).tofile(f)
+            for distances in self.from_landmark:
+                distances.tofile(f)
+            if directed:
+                for distances in self.to_landmark:
+                    distances.tofile(f)
+
+    @classmethod
+    def load(cls, path: str, graph: CSRGraph) -> 'LandmarkIndex':
+        with open(path, 'rb') as f:
+            magic, k, directed, num_nodes, fingerprint = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a landmark index')
+            if num_nodes != graph.num_nodes or fingerprint != graph.fingerprint():
+                raise ValueError(f'{path} was built for a different graph')
+            landmarks = array('q')
+            landmarks.fromfile(f, k)
+            rows = []
+            for _ in range(k * (2 if directed else 1)):
+                row = array('d')
+                row.fromfile(f, num_nodes)
+                rows.append(row)
+        return cls(graph, landmarks, rows[:k], rows[k:] if directed else None)
+
+    @classmethod
+    def load_or_build(cls, path: str, graph: CSRGraph, k: int = 8, strategy: str = 'farthest',
+                      seed: Optional[int] = None) -> 'LandmarkIndex':
+        # Reuse the index saved next to the graph unless it is missing or was
+        # built for a different graph; k and strategy only apply to a rebuild.
+        try:
+            return cls.load(path, graph)
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+        index = cls.build(graph, k=k, strategy=strategy, seed=seed)
+        index.save(path)
+        return index
+
+
+def landmark_index_path(snapshot_path: str) -> str:
+    from ..snapshot import SNAPSHOT_SUFFIX
+
+    if snapshot_path.endswith(SNAPSHOT_SUFFIX):
+        snapshot_path = snapshot_path[:-len(SNAPSHOT_SUFFIX)]
+    return snapshot_path + INDEX_SUFFIX
+
+
+def _argmax_finite(values) -> Optional[int]:
+    best, best_value = None, -1.0
+    for i, value in enumerate(values):
+        if value != math.inf and value > best_value:
+            best, best_value = i, value
+    return best
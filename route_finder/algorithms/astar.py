@@ -0,0 +1,93 @@
+from __future__ import annotations
+import heapq
+from typing import Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from ..utils import haversine_km
+from .algorithms import edge_recorder, search_stats
+
+Heuristic = Callable[[Hashable, Hashable], float]
+
+
+def haversine_heuristic(graph, city_coords: Mapping[Hashable, Tuple[float, float]]) -> Heuristic:
+    # Great-circle distance scaled to the road distances. The scale is the
+    # smallest road/great-circle ratio over all edges, so every edge costs at
+    # least scale * its great-circle length; by the triangle inequality the
+    # bound then never overestimates a route. Cities without coordinates get 0.
+    scale = float('inf')
+    for node, neighbors in graph.items():
+        if node not in city_coords:
+            continue
+        for neighbor, cost in neighbors:
+            if neighbor in city_coords:
+                straight = haversine_km(city_coords[node], city_coords[neighbor])
+                if straight > 0:
+                    scale = min(scale, cost / straight)
+    if scale == float('inf'):
+        scale = 0.0
+    # Keep float rounding from pushing the bound above a true cost.
+    scale *= 1 - 1e-9
+
+    def heuristic(node, goal):
+        if node in city_coords and goal in city_coords:
+            return scale * haversine_km(city_coords[node], city_coords[goal])
+        return 0.0
+
+    heuristic.scale = scale
+    return heuristic
+
+
+def astar(graph, start, goal, heuristic: Optional[Heuristic] = None, stats: Optional[Dict] = None, trace=True):
+    # A* returning the same (path, cost, visited_edges) as dijkstra(). Nodes
+    # are re-expanded when a cheaper route to them appears, which keeps the
+    # result optimal even where the heuristic is not consistent.
+    if heuristic is None:
+        heuristic = _zero_heuristic
+
+    g_costs = {start: 0}
+    frontier = [(heuristic(start, goal), 0, start)]  # (f, g, node)
+    came_from = {}
+    visited_edges = []
+    record_edge = edge_recorder(trace, visited_edges)
+    expanded = 0
+    pops = 0
+    relaxations = 0
+
+    step_counter = 1
+
+    while frontier:
+        _, current_cost, current_node = heapq.heappop(frontier)
+        pops += 1
+
+        if current_cost > g_costs[current_node]:
+            continue  # stale entry
+
+        if current_node == goal:
+            if stats is not None:
+                search_stats(stats, expanded, pops, len(frontier), relaxations, goal_popped=True)
+            path_result = [current_node]
+            while current_node != start:
+                current_node = came_from[current_node]
+                path_result.append(current_node)
+            path_result.reverse()
+            return path_result, current_cost, visited_edges
+
+        expanded += 1
+        neighbors = graph.get(current_node, [])
+        relaxations += len(neighbors)
+        for neighbor, cost in neighbors:
+            new_cost = current_cost + cost
+            if new_cost < g_costs.get(neighbor, float('inf')):
+                g_costs[neighbor] = new_cost
+                came_from[neighbor] = current_node
+                heapq.heappush(frontier, (new_cost + heuristic(neighbor, goal), new_cost, neighbor))
+                if record_edge is not None:
+                    record_edge((current_node, neighbor, step_counter))
+                    step_counter += 1
+
+    if stats is not None:
+        search_stats(stats, expanded, pops, 0, relaxations)
+    return None, float('inf'), visited_edges  # No path found
+
+
+def _zero_heuristic(node, goal):
+    return 0
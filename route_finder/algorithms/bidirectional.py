@@ -0,0 +1,87 @@
+from __future__ import annotations
+import heapq
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
+
+from .algorithms import _degree_sum, edge_recorder, search_stats
+
+
+def reverse_adjacency(graph) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+    # Adjacency of the transposed graph: v -> [(u, cost)] for every arc u -> v.
+    reverse = {node: [] for node in graph}
+    for node, neighbors in graph.items():
+        for neighbor, cost in neighbors:
+            reverse.setdefault(neighbor, []).append((node, cost))
+    return reverse
+
+
+def bidirectional_dijkstra(graph, start, goal, reverse_graph: Optional[Mapping] = None, stats: Optional[Dict] = None,
+                           trace=True):
+    # Forward search from start and backward search from goal, always growing
+    # the side with the smaller queue top. The search stops once the two queue
+    # tops together reach the best start->goal cost seen at a meeting node.
+    # The backward search follows `reverse_graph`; without one it reuses
+    # `graph`, which is right for the undirected graphs extract_graph builds.
+    # Directed CSRGraphs get their reverse adjacency computed here, so pass
+    # reverse_adjacency(graph) when running many queries on one directed graph.
+    if reverse_graph is None:
+        reverse_graph = reverse_adjacency(graph) if getattr(graph, 'directed', False) else graph
+
+    if start == goal:
+        if stats is not None:
+            search_stats(stats, 0, 0, 0, 0)
+        return [start], 0, []
+
+    distances = ({start: 0}, {goal: 0})
+    parents = ({}, {})
+    frontiers = ([(0, start)], [(0, goal)])
+    explored = (set(), set())
+    adjacency = (graph, reverse_graph)
+    visited_edges = []
+    record_edge = edge_recorder(trace, visited_edges)
+    best_cost = float('inf')
+    meeting_node = None
+    pops = 0
+
+    step_counter = 1
+
+    while frontiers[0] and frontiers[1]:
+        if frontiers[0][0][0] + frontiers[1][0][0] >= best_cost:
+            break
+
+        side = 0 if frontiers[0][0][0] <= frontiers[1][0][0] else 1
+        current_cost, current_node = heapq.heappop(frontiers[side])
+        pops += 1
+        if current_node in explored[side]:
+            continue
+        explored[side].add(current_node)
+
+        own_distances, other_distances = distances[side], distances[1 - side]
+        for neighbor, cost in adjacency[side].get(current_node, []):
+            new_cost = current_cost + cost
+            if new_cost < own_distances.get(neighbor, float('inf')):
+                own_distances[neighbor] = new_cost
+                parents[side][neighbor] = current_node
+                heapq.heappush(frontiers[side], (new_cost, neighbor))
+                if record_edge is not None:
+                    record_edge((current_node, neighbor, step_counter))
+                    step_counter += 1
+                if neighbor in other_distances and new_cost + other_distances[neighbor] < best_cost:
+                    best_cost = new_cost + other_distances[neighbor]
+                    meeting_node = neighbor
+
+    if stats is not None:
+        search_stats(stats, len(explored[0]) + len(explored[1]), pops, len(frontiers[0]) + len(frontiers[1]),
+                     _degree_sum(graph, explored[0]) + _degree_sum(reverse_graph, explored[1]))
+
+    if meeting_node is None:
+        return None, float('inf'), visited_edges  # No path found
+
+    path_result = [meeting_node]
+    while path_result[-1] != start:
+        path_result.append(parents[0][path_result[-1]])
+    path_result.reverse()
+    node = meeting_node
+    while node != goal:
+        node = parents[1][node]
+        path_result.append(node)
+    return path_result, best_cost, visited_edges
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import heapq
+import math
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from ..csr import CSRGraph
+from .algorithms import _ids_to_edges, edge_recorder, search_stats
+
+# Contraction Hierarchies.
+#
+# Preprocessing contracts the nodes of a CSRGraph one by one in order of
+# importance (edge difference + number of already contracted neighbours,
+# updated lazily). Removing node v adds a shortcut u -> w for every pair of
+# remaining neighbours whose only shortest connection runs through v, found
+# with a bounded witness search. A query then runs two Dijkstra searches that
+# only climb to higher-ranked nodes, and shortcuts are unpacked back into the
+# real cities they stand for.
+
+
+class ContractionHierarchy:
+    def __init__(self, graph: CSRGraph, rank: List[int], up: Tuple[array, array, array],
+                 down: Tuple[array, array, array], middle: Dict[Tuple[int, int], int]):
+        self.graph = graph
+        self.rank = rank
+        # up:   arcs u -> w with rank[w] > rank[u], indexed by u (forward search)
+        # down: arcs w -> u with rank[w] > rank[u], indexed by u (backward search)
+        self.up = up
+        self.down = down
+        self.middle = middle
+        # Shortcuts encode the weights at build time, so a hierarchy only
+        # answers for the graph version it was built from.
+        self.version = graph.version
+
+    @property
+    def num_shortcuts(self) -> int:
+        return len(self.middle)
+
+    # --- preprocessing ---------------------------------------------------
+
+    @classmethod
+    def build(cls, graph: CSRGraph, witness_limit: int = 500) -> 'ContractionHierarchy':
+        n = graph.num_nodes
+        out_arcs: List[Dict[int, float]] = [{} for _ in range(n)]
+        in_arcs: List[Dict[int, float]] = [{} for _ in range(n)]
+        for u in range(n):
+            for v, cost in graph.arcs(u):
+                if u != v and cost < out_arcs[u].get(v, math.inf):
+                    out_arcs[u][v] = cost
+                    in_arcs[v][u] = cost
+
+        middle: Dict[Tuple[int, int], int] = {}
+        up_arcs: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        down_arcs: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        contracted_neighbors = [0] * n
+        level = [0] * n
+        rank = [0] * n
+
+        def shortcuts(v):
+            needed = []
+            outgoing = out_arcs[v]
+            if not outgoing:
+                return needed
+            max_out = max(outgoing.values())
+            for u, cost_in in in_arcs[v].items():
+                witness = _witness_search(out_arcs, u, v, cost_in + max_out, witness_limit)
+                for w, cost_out in outgoing.items():
+                    if w != u and cost_in + cost_out < witness.get(w, math.inf):
+                        needed.append((u, w, cost_in + cost_out))
+            return needed
+
+        def priority(v):
+            edge_difference = len(shortcuts(v)) - len(in_arcs[v]) - len(out_arcs[v])
+            return 2 * edge_difference + contracted_neighbors[v] + level[v]
+
+        queue = [(priority(v), v) for v in range(n)]
+        heapq.heapify(queue)
+        next_rank = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Lazy update: re-evaluate and contract only if v is still the minimum.
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            rank[v] = next_rank
+            next_rank += 1
+            added = shortcuts(v)
+            neighbors = set(out_arcs[v]).union(in_arcs[v])
+            for w, cost in out_arcs[v].items():
+                up_arcs[v].append((w, cost))
+                del in_arcs[w][v]
+            for u, cost in in_arcs[v].items():
+                down_arcs[v].append((u, cost))
+                del out_arcs[u][v]
+            for u in neighbors:
+                contracted_neighbors[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            out_arcs[v] = {}
+            in_arcs[v] = {}
+            for u, w, cost in added:
+                if cost < out_arcs[u].get(w, math.inf):
+                    out_arcs[u][w] = cost
+                    in_arcs[w][u] = cost
+                    middle[(u, w)] = v
+
+        # Every arc enters the hierarchy with the weight (and middle node) it
+        # has when its first endpoint is contracted; a shortcut only ever
+        # replaces a dearer arc, so `middle` always matches the stored weight.
+        return cls(graph, rank, _to_csr(up_arcs), _to_csr(down_arcs), middle)
+
+    # --- queries -----------------------------------------------------------
+
+    def query(self, start, goal, stats: Optional[Dict] = None, trace=True):
+        # Same (path, cost, visited_edges) tuple as dijkstra(). visited_edges
+        # lists the hierarchy arcs the two upward searches relaxed, so it can
+        # contain shortcuts between cities that are not directly connected.
+        if self.version != self.graph.version:
+            raise ValueError(f'hierarchy was built for graph version {self.version}, the graph is now at version '
+                             f'{self.graph.version}; rebuild it')
+        index, names = self.graph.index, self.graph.names
+        source, target = index.get(start), index.get(goal)
+        if source is None or target is None:
+            return None, float('inf'), []
+        if source == target:
+            if stats is not None:
+                search_stats(stats, 0, 0, 0, 0)
+                stats['stalled'] = 0
+            return [start], 0, []
+
+        distances = ({source: 0}, {target: 0})
+        parents = ({}, {})
+        frontiers = ([(0, source)], [(0, target)])
+        arcs = (self.up, self.down)
+        visited_edges = []
+        record_edge = edge_recorder(trace, visited_edges, names)
+        best_cost = math.inf
+        meeting = -1
+        expanded = 0
+        pops = 0
+        pruned = 0  # entries dropped unpopped once a side cannot improve
+        stalled = 0
+        relaxations = 0
+
+        step_counter = 1
+
+        while frontiers[0] or frontiers[1]:
+            for side in (0, 1):
+                frontier = frontiers[side]
+                if not frontier:
+                    continue
+                if frontier[0][0] >= best_cost:
+                    pruned += len(frontier)
+                    frontier.clear()  # nothing cheaper can come from this side
+                    continue
+                current_cost, current = heapq.heappop(frontier)
+                pops += 1
+                own = distances[side]
+                if current_cost > own[current]:
+                    continue  # stale entry
+                expanded += 1
+                other = distances[1 - side].get(current)
+                if other is not None and current_cost + other < best_cost:
+                    best_cost = current_cost + other
+                    meeting = current
+                # Stall-on-demand: if a higher node already reaches `current`
+                # more cheaply through an arc of the opposite direction, this
+                # distance is not a shortest one and its arcs need no scan.
+                offsets, targets, weights = arcs[1 - side]
+                if any(own.get(targets[i], math.inf) + weights[i] < current_cost
+                       for i in range(offsets[current], offsets[current + 1])):
+                    stalled += 1
+                    continue
+                offsets, targets, weights = arcs[side]
+                relaxations += offsets[current + 1] - offsets[current]
+                for i in range(offsets[current], offsets[current + 1]):
+                    neighbor = targets[i]
+                    new_cost = current_cost + weights[i]
+                    if new_cost < own.get(neighbor, math.inf):
+                        own[neighbor] = new_cost
+                        parents[side][neighbor] = current
+                        heapq.heappush(frontier, (new_cost, neighbor))
+                        if record_edge is not None:
+                            record_edge((current, neighbor, step_counter))
+                            step_counter += 1
+
+        if stats is not None:
+            # Pruned entries count as still queued: pushed but never popped.
+            search_stats(stats, expanded, pops, pruned, relaxations)
+            stats['stalled'] = stalled
+        if meeting < 0:
+            return None, float('inf'), _ids_to_edges(self.graph, visited_edges)  # No path found
+
+        hierarchy_path = [meeting]
+        while hierarchy_path[-1] != source:
+            hierarchy_path.append(parents[0][hierarchy_path[-1]])
+        hierarchy_path.reverse()
+        node = meeting
+        while node != target:
+            node = parents[1][node]
+            hierarchy_path.append(node)
+        return [names[i] for i in self._unpack(hierarchy_path)], best_cost, _ids_to_edges(self.graph, visited_edges)
+
+    def _unpack(self, hierarchy_path: List[int]) -> List[int]:
+        path = [hierarchy_path[0]]
+        middle = self.middle
+        for u, w in zip(hierarchy_path, hierarchy_path[1:]):
+            stack = [(u, w)]
+            while stack:
+                a, b = stack.pop()
+                m = middle.get((a, b))
+                if m is None:
+                    path.append(b)
+                else:
+                    stack.append((m, b))
+                    stack.append((a, m))
+        return path
+
+
+def _witness_search(out_arcs: List[Dict[int, float]], source: int, excluded: int, max_cost: float,
+                    limit: int) -> Dict[int, float]:
+    # Bounded Dijkstra from source in the remaining graph, skipping `excluded`.
+    # Distances it reports are upper bounds, which can only add shortcuts.
+    distances = {source: 0}
+    frontier = [(0, source)]
+    settled = 0
+    while frontier and settled < limit:
+        cost, u = heapq.heappop(frontier)
+        if cost > distances[u]:
+            continue
+        if cost > max_cost:
+            break
+        settled += 1
+        for v, weight in out_arcs[u].items():
+            if v == excluded:
+                continue
+            new_cost = cost + weight
+            if new_cost < distances.get(v, math.inf):
+                distances[v] = new_cost
+                heapq.heappush(frontier, (new_cost, v))
+    return distances
+
+
+def _to_csr(adjacency: List[List[Tuple[int, float]]]) -> Tuple[array, array, array]:
+    offsets = array('q', [0])
+    targets = array('q')
+    weights = array('d')
+    for arcs in adjacency:
+        for v, cost in arcs:
+            targets.append(v)
+            weights.append(cost)
+        offsets.append(len(targets))
+    return offsets, targets, weights
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Hashable, List, Optional
+
+from ..cache import LRUCache
+from ..csr import CSRGraph
+from .algorithms import shortest_path_tree_csr, tree_is_affected
+
+# Single-source shortest-path tree mode: settle the whole tree from a source
+# once, then answer any destination by walking back through predecessors.
+
+
+class ShortestPathTree:
+    def __init__(self, graph: CSRGraph, source: int, distances: List[float], predecessors: List[int]):
+        self.graph = graph
+        self.source = source
+        self.version = graph.version
+        self.distances = distances
+        self.predecessors = predecessors
+
+    @classmethod
+    def compute(cls, graph: CSRGraph, source: Hashable) -> 'ShortestPathTree':
+        source_id = graph.index[source]
+        distances, predecessors = shortest_path_tree_csr(graph, source_id)
+        return cls(graph, source_id, distances, predecessors)
+
+    def cost(self, target: Hashable) -> float:
+        target_id = self.graph.index.get(target)
+        return float('inf') if target_id is None else self.distances[target_id]
+
+    def path(self, target: Hashable) -> Optional[List[Hashable]]:
+        target_id = self.graph.index.get(target)
+        if target_id is None or self.distances[target_id] == float('inf'):
+            return None
+        node_ids = [target_id]
+        while node_ids[-1] != self.source:
+            node_ids.append(self.predecessors[node_ids[-1]])
+        names = self.graph.names
+        return [names[i] for i in reversed(node_ids)]
+
+    def route(self, target: Hashable):
+        # dijkstra()'s (path, cost, visited_edges); a tree answer explores
+        # nothing per query, so visited_edges is always empty.
+        path = self.path(target)
+        return path, (self.cost(target) if path else float('inf')), []
+
+
+class TreeCache:
+    # LRU of shortest-path trees for one graph, keyed by source. After the
+    # graph changes, a cached tree is kept when none of the changes since it
+    # was computed can alter it and recomputed otherwise, so a tree is never
+    # returned for the wrong graph version.
+
+    def __init__(self, graph: CSRGraph, maxsize: int = 64):
+        self.graph = graph
+        self.trees: LRUCache[ShortestPathTree] = LRUCache(maxsize)
+        self.kept = 0
+        self.invalidated = 0
+
+    def tree(self, source: Hashable) -> ShortestPathTree:
+        graph = self.graph
+        tree = self.trees.get(source)
+        if tree is not None and tree.version != graph.version:
+            if tree_is_affected(tree.distances, graph.changes_since(tree.version)):
+                self.invalidated += 1
+                tree = None
+            else:
+                self.kept += 1
+                tree.version = graph.version
+        if tree is None:
+            tree = ShortestPathTree.compute(graph, source)
+            self.trees.put(source, tree)
+        return tree
+
+    def route(self, start: Hashable, goal: Hashable):
+        if start not in self.graph.index:
+            return None, float('inf'), []
+        return self.tree(start).route(goal)
+
+
+def dijkstra_tree(graph: CSRGraph, start: Hashable, goal: Hashable, cache: Optional[TreeCache] = None):
+    # dijkstra() answered from a (cached) shortest-path tree rooted at start.
+    if cache is None:
+        if start not in graph.index:
+            return None, float('inf'), []
+        return ShortestPathTree.compute(graph, start).route(goal)
+    if cache.graph is not graph:
+        raise ValueError('cache belongs to a different graph')
+    return cache.route(start, goal)
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+from .algorithms.algorithms import dijkstra_csr, ucs_csr
+from .algorithms.astar import astar, haversine_heuristic
+from .algorithms.bidirectional import bidirectional_dijkstra
+from .algorithms.tree import TreeCache, dijkstra_tree
+from .csr import CSRGraph
+from .profiling import PhaseTimer
+from .snapshot import SNAPSHOT_SUFFIX, Snapshot, load_graph, load_snapshot
+
+# Headless routing API for scripts, batch jobs and services:
+#
+#     RouteFinder.from_file('east-java-cities-dataset.xlsx').route('Bangkalan', 'Malang', algorithm='astar')
+#
+# Only the standard library and the pure-Python engines are imported here.
+# pandas is imported when a dataset has to be (re)compiled, folium when a map
+# is rendered, and preprocessing (heuristic, landmarks, contraction
+# hierarchy, tree cache) happens on the first query that needs it.
+
+ALGORITHMS = ('dijkstra', 'ucs', 'astar', 'bidirectional', 'alt', 'ch', 'tree')
+
+
+class RouteFinder:
+    def __init__(self, graph: CSRGraph, city_coords: Optional[Dict[Hashable, Tuple[float, float]]] = None,
+                 snapshot: Optional[Snapshot] = None, timings: Optional[PhaseTimer] = None):
+        self.graph = graph
+        self.snapshot = snapshot
+        self._city_coords = city_coords
+        self._heuristic = None
+        self._landmarks = None
+        self._hierarchy = None
+        self._reverse = None
+        self._tree_cache = None
+        self._version = graph.version
+        # Wall time per phase: load, build:<structure>, search, render.
+        self.timings = timings or PhaseTimer()
+
+    @classmethod
+    def from_file(cls, path: str, use_snapshot: bool = True) -> 'RouteFinder':
+        # Accepts a compiled snapshot or a dataset. Datasets go through their
+        # snapshot (compiled on first use, memory-mapped afterwards) unless
+        # use_snapshot is False, in which case they are loaded in memory.
+        timings = PhaseTimer()
+        with timings.phase('load'):
+            if str(path).endswith(SNAPSHOT_SUFFIX):
+                return cls.from_snapshot(load_snapshot(path), timings)
+            if use_snapshot:
+                return cls.from_snapshot(load_graph(path), timings)
+            from .data_loader import load_dataset
+            from .graph_io import extract_city_coords
+
+            df = load_dataset(path)
+            return cls(CSRGraph.from_frame(df), extract_city_coords(df), timings=timings)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot, timings: Optional[PhaseTimer] = None) -> 'RouteFinder':
+        return cls(snapshot.graph, snapshot=snapshot, timings=timings)
+
+    @property
+    def city_coords(self) -> Dict[Hashable, Tuple[float, float]]:
+        if self._city_coords is None:
+            self._city_coords = self.snapshot.city_coords() if self.snapshot is not None else {}
+        return self._city_coords
+
+    @property
+    def cities(self):
+        return self.graph.names
+
+    def route(self, start: Hashable, goal: Hashable, algorithm: str = 'dijkstra', stats: Optional[Dict] = None,
+              trace=False):
+        # Same (path, cost, visited_edges) tuple as every engine. Tracing is
+        # off by default, so visited_edges is empty unless trace=True (or an
+        # observer callable) is passed. `stats` receives the search counters
+        # (settled, pops, pushes, stale_pops, relaxations); 'tree' is
+        # answered from cached shortest-path trees and reports no stats or
+        # trace. Preprocessing a query triggers is timed as build:<name>,
+        # the query itself as search.
+        self.refresh()
+        self._prepare(algorithm)
+        with self.timings.phase('search'):
+            return self._search(start, goal, algorithm, stats, trace)
+
+    def diagnose(self, start: Hashable, goal: Hashable, algorithm: str = 'dijkstra', profile: bool = False) -> Dict:
+        # One instrumented query: result, search counters, its search time,
+        # the accumulated phase timings and, with profile=True, the cProfile
+        # table of the search.
+        from .profiling import profile_call
+
+        self.refresh()
+        self._prepare(algorithm)
+        stats = {}
+        report = {'algorithm': algorithm, 'profile': None}
+        if profile:
+            start_time = time.perf_counter()
+            result, report['profile'] = profile_call(self.route, start, goal, algorithm, stats)
+        else:
+            start_time = time.perf_counter()
+            result = self.route(start, goal, algorithm, stats)
+        report.update(search_seconds=time.perf_counter() - start_time, counters=stats,
+                      phases=self.timings.summary(), path=result[0], cost=result[1])
+        return report
+
+    def plan_tour(self, stops, start: Optional[Hashable] = None, round_trip: bool = True,
+                  workers: Optional[int] = None, **options):
+        # Best order to visit `stops`, as a tour.Tour; its .path is the full
+        # road path for render(). The stop-to-stop matrix is timed as
+        # build:matrix, the ordering as search.
+        from .matrix import distance_matrix
+        from .tour import plan_tour
+
+        self.refresh()
+        stops = list(dict.fromkeys(stops if start is None or start in stops else [start, *stops]))
+        for name in stops:
+            if name not in self.graph.index:
+                raise KeyError(f'unknown city {name!r}')
+        with self.timings.phase('build:matrix'):
+            matrix = distance_matrix(self.graph, stops, stops, workers=workers)
+        with self.timings.phase('search'):
+            return plan_tour(self.graph, stops, start=start, round_trip=round_trip, matrix=matrix, **options)
+
+    def _prepare(self, algorithm: str) -> None:
+        # Build what `algorithm` needs before its search is timed.
+        needs = {'astar': 'heuristic', 'bidirectional': 'reverse_graph', 'alt': 'landmarks', 'ch': 'hierarchy',
+                 'tree': 'tree_cache'}.get(algorithm)
+        if needs is not None:
+            getattr(self, needs)
+
+    def _search(self, start, goal, algorithm, stats, trace):
+        graph = self.graph
+        if algorithm == 'dijkstra':
+            return dijkstra_csr(graph, start, goal, stats=stats, trace=trace)
+        if algorithm == 'ucs':
+            return ucs_csr(graph, start, goal, stats=stats, trace=trace)
+        if algorithm == 'astar':
+            return astar(graph, start, goal, heuristic=self.heuristic, stats=stats, trace=trace)
+        if algorithm == 'bidirectional':
+            return bidirectional_dijkstra(graph, start, goal, reverse_graph=self.reverse_graph, stats=stats,
+                                          trace=trace)
+        if algorithm == 'alt':
+            return astar(graph, start, goal, heuristic=self.landmarks, stats=stats, trace=trace)
+        if algorithm == 'ch':
+            return self.hierarchy.query(start, goal, stats=stats, trace=trace)
+        if algorithm == 'tree':
+            return dijkstra_tree(graph, start, goal, cache=self.tree_cache)
+        raise ValueError(f'unknown algorithm {algorithm!r}, expected one of {", ".join(ALGORITHMS)}')
+
+    # --- lazily built preprocessing ---------------------------------------
+    # After in-place edge changes (graph.update_edge/add_edge/remove_edge)
+    # _sync() drops only what the changes invalidate. The tree cache and the
+    # landmark index catch up on their own, per tree and per landmark.
+
+    def refresh(self) -> None:
+        # Catch up with in-place graph changes now rather than on the next
+        # query (which does it anyway).
+        if self._version != self.graph.version:
+            self._sync()
+
+    def _sync(self) -> None:
+        changes = self.graph.changes_since(self._version)
+        if self._heuristic is not None and any(self._breaks_heuristic(u, v, new) for _, u, v, old, new in changes
+                                               if new < old):
+            self._heuristic = None
+        # A hierarchy's shortcuts encode the old weights; it is rebuilt on
+        # the next 'ch' query.
+        self._hierarchy = None
+        self._reverse = None
+        self._version = self.graph.version
+
+    def _breaks_heuristic(self, u: int, v: int, weight: float) -> bool:
+        # A cheaper road can lower the smallest road/great-circle ratio the
+        # haversine bound is scaled by; a dearer or removed one cannot.
+        from .utils import haversine_km
+
+        names, coords = self.graph.names, self.city_coords
+        if names[u] not in coords or names[v] not in coords:
+            return False
+        straight = haversine_km(coords[names[u]], coords[names[v]])
+        return straight > 0 and weight / straight * (1 - 1e-9) < self._heuristic.scale
+
+    @property
+    def heuristic(self):
+        if self._heuristic is None:
+            with self.timings.phase('build:heuristic'):
+                self._heuristic = haversine_heuristic(self.graph, self.city_coords)
+        return self._heuristic
+
+    @property
+    def reverse_graph(self) -> Optional[CSRGraph]:
+        if self._reverse is None and self.graph.directed:
+            with self.timings.phase('build:reverse'):
+                self._reverse = self.graph.reverse()
+        return self._reverse
+
+    @property
+    def landmarks(self):
+        if self._landmarks is None:
+            from .algorithms.alt import LandmarkIndex, landmark_index_path
+
+            with self.timings.phase('build:landmarks'):
+                # The index file belongs to the snapshot as compiled; an
+                # edited graph gets an in-memory index instead.
+                if self.snapshot is not None and self.snapshot.path and self.graph.version == 0:
+                    self._landmarks = LandmarkIndex.load_or_build(landmark_index_path(self.snapshot.path), self.graph)
+                else:
+                    self._landmarks = LandmarkIndex.build(self.graph)
+        return self._landmarks
+
+    @property
+    def hierarchy(self):
+        if self._hierarchy is None:
+            from .algorithms.ch import ContractionHierarchy
+
+            with self.timings.phase('build:ch'):
+                self._hierarchy = ContractionHierarchy.build(self.graph)
+        return self._hierarchy
+
+    @property
+    def tree_cache(self) -> TreeCache:
+        if self._tree_cache is None:
+            self._tree_cache = TreeCache(self.graph)
+        return self._tree_cache
+
+    # --- rendering ---------------------------------------------------------
+
+    def render(self, path=None, visited_edges=None):
+        # folium map of the network with the route drawn in; this is the
+        # only method that imports folium.
+        from .graph_io import base_map, graph_base_layer, route_overlay
+
+        with self.timings.phase('render'):
+            m = base_map(graph_base_layer(self.graph, self.city_coords))
+            route_overlay(path, visited_edges, self.city_coords).add_to(m)
+        return m
+
+    def __repr__(self) -> str:
+        return f'RouteFinder({self.graph!r})'
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .algorithms.algorithms import dijkstra_csr
+from .algorithms.tree import ShortestPathTree
+from .csr import CSRGraph
+from .utils import open_stream
+
+# Batch routing: answer a file of (origin, destination) pairs.
+#
+# Pairs are grouped by origin so that an origin with several destinations
+# settles one shortest-path tree and walks it once per destination; an
+# origin with a single destination runs an early-exit dijkstra_csr instead.
+# Both give the same path and cost as dijkstra(). Groups are spread over a
+# process pool that receives the graph once, through the initializer (a
+# snapshot-backed graph is re-mapped from its file, see matrix.py), and
+# results are written as soon as each batch finishes, tagged with the
+# 0-based index of the pair in the input.
+
+Pair = Tuple[int, Hashable, Hashable]          # (index, origin, destination)
+Result = Tuple[int, Hashable, Hashable, float, Optional[List[Hashable]]]
+
+
+def read_pairs(path: str) -> Iterator[Pair]:
+    # CSV with Origin/Destination columns (any case), or JSON Lines with
+    # "origin"/"destination" keys when the name ends in .jsonl/.ndjson.
+    with open_stream(path) as f:
+        if str(path).lower().endswith(('.jsonl', '.ndjson')):
+            index = 0
+            for line in f:
+                if line.strip():
+                    record = {key.lower(): value for key, value in json.loads(line).items()}
+                    yield index, record['origin'], record['destination']
+                    index += 1
+        else:
+            reader = csv.DictReader(f)
+            columns = {name.lower(): name for name in reader.fieldnames or ()}
+            if 'origin' not in columns or 'destination' not in columns:
+                raise ValueError(f'{path} needs Origin and Destination columns')
+            for index, row in enumerate(reader):
+                yield index, row[columns['origin']], row[columns['destination']]
+
+
+def group_by_origin(pairs) -> Dict[Hashable, List[Tuple[int, Hashable]]]:
+    groups: Dict[Hashable, List[Tuple[int, Hashable]]] = {}
+    for index, origin, destination in pairs:
+        groups.setdefault(origin, []).append((index, destination))
+    return groups
+
+
+def solve_group(graph: CSRGraph, origin: Hashable, destinations: List[Tuple[int, Hashable]],
+                with_paths: bool = True) -> List[Result]:
+    if origin not in graph.index:
+        return [(index, origin, destination, math.inf, None) for index, destination in destinations]
+    results = []
+    if len(destinations) == 1:
+        index, destination = destinations[0]
+        path, cost, _ = dijkstra_csr(graph, origin, destination, trace=False)
+        results.append((index, origin, destination, cost, path if with_paths else None))
+    else:
+        tree = ShortestPathTree.compute(graph, origin)
+        for index, destination in destinations:
+            results.append((index, origin, destination, tree.cost(destination),
+                            tree.path(destination) if with_paths else None))
+    return results
+
+
+def run_batch(graph: CSRGraph, pairs, workers: Optional[int] = None, with_paths: bool = True) -> Iterator[List[Result]]:
+    # Yields lists of results in completion order. workers=1 runs
+    # in-process; None uses one worker per CPU.
+    groups = list(group_by_origin(pairs).items())
+    total = sum(len(destinations) for _, destinations in groups)
+    workers = min(workers or os.cpu_count() or 1, len(groups) or 1)
+    if workers <= 1:
+        for origin, destinations in groups:
+            yield solve_group(graph, origin, destinations, with_paths)
+        return
+
+    # About four batches per worker, balanced by query count.
+    target = max(1, math.ceil(total / (workers * 4)))
+    batches, batch, size = [], [], 0
+    for group in groups:
+        batch.append(group)
+        size += len(group[1])
+        if size >= target:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph, with_paths)) as pool:
+        pending = {pool.submit(_solve_batch, batch) for batch in batches}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class ResultWriter:
+    # Streams results as JSON Lines or CSV and flushes after every batch.
+    def __init__(self, f, fmt: str = 'jsonl'):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"unknown output format {fmt!r}, expected 'jsonl' or 'csv'")
+        self.f = f
+        self.fmt = fmt
+        self.count = 0
+        if fmt == 'csv':
+            self._csv = csv.writer(f)
+            self._csv.writerow(('index', 'origin', 'destination', 'cost', 'path'))
+
+    def write(self, results: List[Result]) -> None:
+        for index, origin, destination, cost, path in results:
+            cost = None if cost == math.inf else cost
+            if self.fmt == 'jsonl':
+                self.f.write(json.dumps({'index': index, 'origin': origin, 'destination': destination,
+                                         'cost': cost, 'path': path}) + '\n')
+            else:
+                self._csv.writerow((index, origin, destination, '' if cost is None else cost,
+                                    ' -> '.join(map(str, path)) if path else ''))
+        self.count += len(results)
+        self.f.flush()
+
+
+_worker_graph: Optional[CSRGraph] = None
+_worker_with_paths = True
+
+
+def _init_worker(graph: CSRGraph, with_paths: bool) -> None:
+    global _worker_graph, _worker_with_paths
+    _worker_graph = graph
+    _worker_with_paths = with_paths
+
+
+def _solve_batch(groups) -> List[Result]:
+    results = []
+    for origin, destinations in groups:
+        results.extend(solve_group(_worker_graph, origin, destinations, _worker_with_paths))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m route_finder batch',
+                                     description='Route every (origin, destination) pair in a CSV or JSON Lines file.')
+    parser.add_argument('pairs', help='CSV with Origin/Destination columns, or .jsonl with origin/destination keys '
+                                      "('-' reads CSV from stdin)")
+    parser.add_argument('-g', '--graph', default='./east-java-cities-dataset.xlsx',
+                        help='dataset or compiled .graph.bin snapshot (default: %(default)s)')
+    parser.add_argument('-o', '--output', default='-', help='output path (default: stdout)')
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'),
+                        help='output format (default: from the output extension, else jsonl)')
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--no-paths', action='store_true', help='write costs only')
+    args = parser.parse_args(argv)
+
+    from .api import RouteFinder
+
+    fmt = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    graph = RouteFinder.from_file(args.graph).graph
+    start = time.perf_counter()
+    pairs = list(read_pairs(args.pairs))
+    sources = len({origin for _, origin, _ in pairs})
+    with open_stream(args.output, 'w') as f:
+        writer = ResultWriter(f, fmt)
+        for results in run_batch(graph, pairs, workers=args.workers, with_paths=not args.no_paths):
+            writer.write(results)
+    elapsed = time.perf_counter() - start
+    rate = writer.count / elapsed if elapsed > 0 else math.inf
+    print(f'{writer.count} queries from {sources} origins in {elapsed:.3f}s ({rate:,.0f} queries/s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import gc
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Optional
+
+# Benchmark primitives shared by the Streamlit UI and benchmarks/suite.py.
+#
+# Timing and memory are measured in separate passes: the timed calls run
+# without tracemalloc, and one extra call runs under tracemalloc to record
+# the peak traced memory and the number of memory blocks the call leaves
+# allocated (its result included). An optional third pass of several calls
+# under tracemalloc gives the blocks and bytes allocated per query.
+
+
+@dataclass
+class Measurement:
+    name: str
+    times: List[float] = field(repr=False)
+    warmup: int = 0
+    settled: Optional[int] = None
+    peak_kb: Optional[float] = None
+    retained_blocks: Optional[int] = None
+    alloc_blocks: Optional[float] = None  # memory blocks allocated per query
+    alloc_kb: Optional[float] = None
+    counters: Dict[str, int] = field(default_factory=dict)  # search counters of the traced call
+    params: Dict[str, object] = field(default_factory=dict)
+    result: object = field(default=None, repr=False, compare=False)  # return value of the traced call
+
+    @property
+    def rounds(self) -> int:
+        return len(self.times)
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    @property
+    def max(self) -> float:
+        return max(self.times)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def stddev(self) -> float:
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+
+    @property
+    def iqr(self) -> float:
+        return self.percentile(75) - self.percentile(25)
+
+    @property
+    def ops(self) -> float:
+        return 1 / self.mean if self.mean > 0 else math.inf
+
+    def percentile(self, p: float) -> float:
+        # Linear interpolation between closest ranks.
+        ordered = sorted(self.times)
+        rank = (len(ordered) - 1) * p / 100
+        low = math.floor(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    def summary(self) -> Dict[str, object]:
+        result = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ('times', 'result')}
+        result.update(rounds=self.rounds, min=self.min, max=self.max, mean=self.mean, stddev=self.stddev,
+                      median=self.median, iqr=self.iqr, p90=self.percentile(90), p99=self.percentile(99),
+                      ops=self.ops)
+        return result
+
+
+def time_calls(func: Callable, *args, warmup: int = 3, repeats: int = 30, **kwargs) -> List[float]:
+    for _ in range(warmup):
+        func(*args, **kwargs)
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # keep collector pauses out of individual samples
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return times
+
+
+def trace_memory(func: Callable, *args, **kwargs):
+    # Returns (result, peak traced KiB, blocks still allocated after the call).
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return result, (peak - base) / 1024, retained
+
+
+def count_allocations(func: Callable, calls: List[tuple], **kwargs):
+    # Returns (blocks, KiB) allocated per call, averaged over `calls` (one
+    # argument tuple per call). Every result is kept until the window
+    # closes, so what a query hands back is counted along with its caches;
+    # temporaries freed before the call returns are not.
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        results = []
+        before = tracemalloc.take_snapshot()
+        for args in calls:
+            results.append(func(*args, **kwargs))
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    own = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+    diffs = after.filter_traces(own).compare_to(before.filter_traces(own), 'filename')
+    blocks = sum(stat.count_diff for stat in diffs if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in diffs if stat.size_diff > 0)
+    del results
+    return blocks / len(calls), size / 1024 / len(calls)
+
+
+def measure(name: str, func: Callable, *args, warmup: int = 3, repeats: int = 30, count_settled: bool = True,
+            alloc_calls: int = 0, params: Optional[Dict[str, object]] = None, **kwargs) -> Measurement:
+    # Times `func(*args, **kwargs)` and traces one more call. With
+    # count_settled, that call also gets `stats={}` to report settled nodes
+    # and the other search counters. alloc_calls > 0 runs that many more
+    # calls to count allocations per query.
+    times = time_calls(func, *args, warmup=warmup, repeats=repeats, **kwargs)
+    alloc_blocks = alloc_kb = None
+    if alloc_calls > 0:
+        alloc_blocks, alloc_kb = count_allocations(func, [args] * alloc_calls, **kwargs)
+    stats = {} if count_settled else None
+    if count_settled:
+        kwargs = dict(kwargs, stats=stats)
+    result, peak_kb, retained = trace_memory(func, *args, **kwargs)
+    return Measurement(name, times, warmup=warmup, settled=(stats or {}).get('expanded'),
+                       peak_kb=peak_kb, retained_blocks=retained, alloc_blocks=alloc_blocks, alloc_kb=alloc_kb,
+                       counters=dict(stats or {}),
+                       params=dict(params or {}), result=result)
+
+
+def format_table(measurements: List[Measurement], unit: str = 'us') -> str:
+    # pytest-benchmark style: one row per benchmark, sorted by mean time.
+    scale = {'s': 1, 'ms': 1e3, 'us': 1e6}[unit]
+    headers = ['Name (time in ' + unit + ')', 'Min', 'Max', 'Mean', 'StdDev', 'Median', 'IQR', 'P90', 'P99',
+               'OPS', 'Rounds', 'Settled', 'Peak KiB', 'Blocks', 'Allocs']
+    rows = []
+    for m in sorted(measurements, key=lambda m: m.mean):
+        rows.append([m.name] + [f'{value * scale:.3f}' for value in
+                                (m.min, m.max, m.mean, m.stddev, m.median, m.iqr, m.percentile(90), m.percentile(99))]
+                    + [f'{m.ops:.1f}', str(m.rounds), '-' if m.settled is None else str(m.settled),
+                       '-' if m.peak_kb is None else f'{m.peak_kb:.2f}',
+                       '-' if m.retained_blocks is None else str(m.retained_blocks),
+                       '-' if m.alloc_blocks is None else f'{m.alloc_blocks:.1f}'])
+    widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    line = '-' * (sum(widths) + 2 * (len(widths) - 1))
+    out = [line, '  '.join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(headers, widths))), line]
+    for row in rows:
+        out.append('  '.join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+    out.append(line)
+    return '\n'.join(out)
+
+
+def to_json(measurements: List[Measurement], **context) -> str:
+    return json.dumps({
+        'machine_info': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'context': context,
+        'datetime': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'benchmarks': [dict(m.summary(), times=m.times) for m in measurements],
+    }, indent=2, default=str)
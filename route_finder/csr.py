@@ -0,0 +1,384 @@
+from __future__ import annotations
+import bisect
+import hashlib
+import math
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+# Compact graph engine: city names are interned to dense int IDs and the
+# adjacency is stored as CSR arrays (offsets, targets, weights). The arcs of
+# node ``u`` live in ``targets[offsets[u]:offsets[u + 1]]``.
+#
+# IDs follow sorted name order so heap ties (cost, id) break exactly like the
+# (cost, name) ties in the name-keyed searches, and every node keeps its
+# neighbours in the same order ``extract_graph`` would produce.
+
+
+class CSRGraph(Mapping):
+    def __init__(self, names: Sequence[Hashable], offsets, targets, weights, directed: bool = False):
+        if len(offsets) != len(names) + 1:
+            raise ValueError('offsets must have exactly one entry more than names')
+        if len(targets) != len(weights) or offsets[len(names)] != len(targets):
+            raise ValueError('targets and weights must cover offsets[-1] arcs')
+        self.names = list(names)
+        self.index: Dict[Hashable, int] = {name: i for i, name in enumerate(self.names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.directed = directed
+        # Set by snapshot.load_snapshot(): lets worker processes map the same
+        # file instead of receiving a pickled copy of the arrays.
+        self.snapshot_path = None
+        # Bumped on every in-place change; caches of derived results key on it.
+        self.version = 0
+        # One (version, u, v, old weight, new weight) entry per changed arc,
+        # inf standing for a missing arc; see update_edge().
+        self.changes: List[Tuple[int, int, int, float, float]] = []
+
+    # --- construction ---------------------------------------------------
+
+    @classmethod
+    def from_adjacency(cls, graph: Mapping, directed: bool = False) -> 'CSRGraph':
+        nodes = set(graph)
+        for neighbors in graph.values():
+            nodes.update(neighbor for neighbor, _ in neighbors)
+        names = sorted(nodes)
+        index = {name: i for i, name in enumerate(names)}
+
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = array('d')
+        for name in names:
+            for neighbor, cost in graph.get(name, []):
+                targets.append(index[neighbor])
+                weights.append(cost)
+            offsets.append(len(targets))
+        return cls(names, offsets, targets, weights, directed=directed)
+
+    @classmethod
+    def from_edges(cls, origins: Iterable[Hashable], destinations: Iterable[Hashable],
+                   distances: Iterable[float], directed: bool = False) -> 'CSRGraph':
+        origins = list(origins)
+        destinations = list(destinations)
+        distances = list(distances)
+        if not len(origins) == len(destinations) == len(distances):
+            raise ValueError('origins, destinations and distances must have the same length')
+
+        names = sorted(set(origins).union(destinations))
+        index = {name: i for i, name in enumerate(names)}
+        src = [index[name] for name in origins]
+        dst = [index[name] for name in destinations]
+        if not directed:
+            # Same arc order as extract_graph: o->d then d->o for every row.
+            src, dst = [x for pair in zip(src, dst) for x in pair], [x for pair in zip(dst, src) for x in pair]
+            distances = [x for d in distances for x in (d, d)]
+        return cls._from_arcs(names, src, dst, distances, directed)
+
+    @classmethod
+    def from_frame(cls, df, directed: bool = False) -> 'CSRGraph':
+        # Vectorized equivalent of from_edges(df['Origin'], df['Destination'], df['Distance']):
+        # interning, arc interleaving and the stable sort by source all run in pandas/NumPy.
+        import numpy as np
+        import pandas as pd
+
+        # Hash-based interning, then sort only the unique names to get sorted IDs.
+        codes, uniques = pd.factorize(pd.concat([df['Origin'], df['Destination']], ignore_index=True))
+        order = np.argsort(np.asarray(uniques, dtype=object), kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        names = np.asarray(uniques, dtype=object)[order]
+        codes = rank[codes]
+        src, dst = codes[:len(df)], codes[len(df):]
+        distances = df['Distance'].to_numpy(dtype=np.float64)
+        if not directed:
+            src, dst = np.column_stack([src, dst]).ravel(), np.column_stack([dst, src]).ravel()
+            distances = np.repeat(distances, 2)
+
+        order = np.argsort(src, kind='stable')
+        counts = np.bincount(src, minlength=len(names))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(
+            names.tolist(),
+            array('q', offsets.tobytes()),
+            array('q', dst[order].astype(np.int64).tobytes()),
+            array('d', distances[order].tobytes()),
+            directed=directed,
+        )
+
+    @classmethod
+    def _from_arcs(cls, names, src: List[int], dst: List[int], distances: List[float], directed: bool) -> 'CSRGraph':
+        # Stable counting sort of the arcs by source node.
+        n = len(names)
+        counts = [0] * (n + 1)
+        for u in src:
+            counts[u + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array('q', counts)
+
+        cursor = counts[:-1]
+        targets = array('q', bytes(8 * len(src)))
+        weights = array('d', bytes(8 * len(src)))
+        for u, v, cost in zip(src, dst, distances):
+            slot = cursor[u]
+            targets[slot] = v
+            weights[slot] = cost
+            cursor[u] = slot + 1
+        return cls(names, offsets, targets, weights, directed=directed)
+
+    # --- id-level access --------------------------------------------------
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_arcs(self) -> int:
+        return len(self.targets)
+
+    def arcs(self, node_id: int) -> Iterator[Tuple[int, float]]:
+        targets, weights = self.targets, self.weights
+        for i in range(self.offsets[node_id], self.offsets[node_id + 1]):
+            yield targets[i], weights[i]
+
+    def fingerprint(self) -> bytes:
+        # SHA-256 of the node table and arcs; identifies the exact graph that
+        # a derived index (landmarks, hierarchies, ...) was computed on.
+        digest = hashlib.sha256()
+        digest.update(b'directed' if self.directed else b'undirected')
+        digest.update('\0'.join(map(str, self.names)).encode('utf-8'))
+        for section in (self.offsets, self.targets, self.weights):
+            digest.update(memoryview(section).cast('B'))
+        return digest.digest()
+
+    def reverse(self) -> 'CSRGraph':
+        # Transposed graph (every arc u -> v becomes v -> u), same node IDs.
+        if not self.directed:
+            return self
+        src = [u for u in range(self.num_nodes) for _ in range(self.offsets[u], self.offsets[u + 1])]
+        return self._from_arcs(self.names, list(self.targets), src, list(self.weights), directed=True)
+
+    def to_adjacency(self) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        return {name: self[name] for name in self.names}
+
+    # --- in-place updates -------------------------------------------------
+    # Roads are addressed by city name; on an undirected graph both arcs of a
+    # road change together. Every call bumps `version` and logs its arc
+    # changes in `changes`, so cached trees and indexes can tell whether
+    # they are affected (algorithms.tree_is_affected) instead of being
+    # dropped wholesale. The node set is fixed: new cities need a rebuild.
+    # A snapshot-backed graph is copied into memory on its first change and
+    # no longer refers to its file.
+
+    def update_edge(self, origin: Hashable, destination: Hashable, weight: float) -> None:
+        # Sets the weight of every (parallel) arc origin -> destination.
+        arcs = self._edge_slots(origin, destination)
+        if not any(slots for _, _, slots in arcs):
+            raise KeyError(f'no edge {origin!r} -> {destination!r}')
+        self._make_writable()
+        self.version += 1
+        for u, v, slots in arcs:
+            for i in slots:
+                self.changes.append((self.version, u, v, self.weights[i], weight))
+                self.weights[i] = weight
+
+    def add_edge(self, origin: Hashable, destination: Hashable, weight: float) -> None:
+        # New arcs go after the existing arcs of their source, where
+        # from_edges() would have put a road listed last.
+        arcs = self._edge_slots(origin, destination)
+        if any(slots for _, _, slots in arcs):
+            raise ValueError(f'{origin!r} -> {destination!r} already exists; use update_edge()')
+        self._make_writable()
+        self.version += 1
+        for u, v, _ in arcs:
+            slot = self.offsets[u + 1]
+            self.targets.insert(slot, v)
+            self.weights.insert(slot, weight)
+            for i in range(u + 1, len(self.offsets)):
+                self.offsets[i] += 1
+            self.changes.append((self.version, u, v, math.inf, weight))
+
+    def remove_edge(self, origin: Hashable, destination: Hashable) -> None:
+        arcs = self._edge_slots(origin, destination)
+        if not any(slots for _, _, slots in arcs):
+            raise KeyError(f'no edge {origin!r} -> {destination!r}')
+        self._make_writable()
+        self.version += 1
+        for u, v, _ in arcs:
+            # Re-scan: removing the first direction shifts the second's slots.
+            for i in reversed([i for i in range(self.offsets[u], self.offsets[u + 1]) if self.targets[i] == v]):
+                self.changes.append((self.version, u, v, self.weights[i], math.inf))
+                del self.targets[i]
+                del self.weights[i]
+                for j in range(u + 1, len(self.offsets)):
+                    self.offsets[j] -= 1
+
+    def changes_since(self, version: int) -> List[Tuple[int, int, int, float, float]]:
+        return self.changes[bisect.bisect_right(self.changes, version, key=lambda change: change[0]):]
+
+    def apply_changes(self, changes: List[Tuple[int, int, int, float, float]]) -> None:
+        # Replays another copy's change log (as returned by changes_since)
+        # arc by arc, so a worker process holding a copy of this graph can
+        # catch up with edits made in its parent. Entries at or below our
+        # version are already applied and skipped.
+        changes = [change for change in changes if change[0] > self.version]
+        if not changes:
+            return
+        self._make_writable()
+        for version, u, v, old, new in changes:
+            if old == math.inf:
+                slot = self.offsets[u + 1]
+                self.targets.insert(slot, v)
+                self.weights.insert(slot, new)
+                for j in range(u + 1, len(self.offsets)):
+                    self.offsets[j] += 1
+            else:
+                i = next(i for i in range(self.offsets[u], self.offsets[u + 1])
+                         if self.targets[i] == v and self.weights[i] == old)
+                if new == math.inf:
+                    del self.targets[i]
+                    del self.weights[i]
+                    for j in range(u + 1, len(self.offsets)):
+                        self.offsets[j] -= 1
+                else:
+                    self.weights[i] = new
+            self.changes.append((version, u, v, old, new))
+            self.version = version
+
+    def _edge_slots(self, origin: Hashable, destination: Hashable) -> List[Tuple[int, int, List[int]]]:
+        for name in (origin, destination):
+            if name not in self.index:
+                raise KeyError(f'unknown city {name!r}')
+        u, v = self.index[origin], self.index[destination]
+        pairs = [(u, v)] if self.directed or u == v else [(u, v), (v, u)]
+        return [(a, b, [i for i in range(self.offsets[a], self.offsets[a + 1]) if self.targets[i] == b])
+                for a, b in pairs]
+
+    def _make_writable(self) -> None:
+        if not isinstance(self.weights, array):
+            self.offsets = array('q', self.offsets)
+            self.targets = array('q', self.targets)
+            self.weights = array('d', self.weights)
+            self.snapshot_path = None
+
+    # --- Mapping view (name -> [(neighbor, cost), ...]) -------------------
+    # Lets the name-keyed algorithms run unchanged on a CSRGraph.
+
+    def __getitem__(self, name: Hashable) -> List[Tuple[Hashable, float]]:
+        u = self.index[name]
+        names = self.names
+        return [(names[v], cost) for v, cost in self.arcs(u)]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.index
+
+    def __reduce__(self):
+        if self.snapshot_path is not None:
+            from .snapshot import open_snapshot_graph
+            return open_snapshot_graph, (self.snapshot_path,)
+        # The version travels with the arrays, so a copy knows which logged
+        # changes it already contains (see apply_changes).
+        return self.__class__, (self.names, array('q', self.offsets), array('q', self.targets),
+                                array('d', self.weights), self.directed), {'version': self.version}
+
+    def __repr__(self) -> str:
+        kind = 'directed' if self.directed else 'undirected'
+        return f'CSRGraph({self.num_nodes} nodes, {self.num_arcs} arcs, {kind})'
+
+
+class CSRBuilder:
+    # Incremental CSRGraph construction from edge-list chunks.
+    #
+    # Each chunk is interned on arrival: only the name table, three compact
+    # per-row arrays (source ID, target ID, distance) and the per-city
+    # coordinates are kept, so peak memory follows the final graph rather
+    # than the raw table. build() gives the same graph as from_frame() on
+    # the concatenated chunks, and the coordinates extract_city_coords()
+    # would take from them (last row per Origin wins).
+
+    def __init__(self, directed: bool = False):
+        self.directed = directed
+        self._ids: Dict[Hashable, int] = {}
+        self._src = array('q')
+        self._dst = array('q')
+        self._weights = array('d')
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+
+    def add_chunk(self, df) -> None:
+        import numpy as np
+        import pandas as pd
+
+        if not len(df):
+            return
+        codes, uniques = pd.factorize(pd.concat([df['Origin'], df['Destination']], ignore_index=True))
+        ids = self._ids
+        chunk_ids = np.fromiter((ids.setdefault(name, len(ids)) for name in uniques), dtype=np.int64, count=len(uniques))
+        codes = chunk_ids[codes]
+        origins = codes[:len(df)]
+        self._src.frombytes(origins.tobytes())
+        self._dst.frombytes(codes[len(df):].tobytes())
+        self._weights.frombytes(df['Distance'].to_numpy(dtype=np.float64).tobytes())
+
+        grow = len(ids) - len(self._latitudes)
+        if grow:
+            self._latitudes.frombytes(np.full(grow, np.nan).tobytes())
+            self._longitudes.frombytes(np.full(grow, np.nan).tobytes())
+        if 'Latitude' in df and 'Longitude' in df:
+            last = pd.DataFrame({'id': origins, 'lat': df['Latitude'].to_numpy(dtype=np.float64),
+                                 'lon': df['Longitude'].to_numpy(dtype=np.float64)}).drop_duplicates('id', keep='last')
+            latitudes = np.frombuffer(self._latitudes, dtype=np.float64)
+            longitudes = np.frombuffer(self._longitudes, dtype=np.float64)
+            latitudes[last['id'].to_numpy()] = last['lat'].to_numpy()
+            longitudes[last['id'].to_numpy()] = last['lon'].to_numpy()
+            del latitudes, longitudes  # release the buffers so the arrays can grow again
+
+    def build(self) -> Tuple['CSRGraph', array, array]:
+        # Returns (graph, latitudes, longitudes); coordinates are indexed by
+        # node ID and NaN for cities that never appear as an Origin. The
+        # builder's row arrays are released as the CSR arrays are filled.
+        import numpy as np
+
+        arrival_names = list(self._ids)
+        order = np.array(sorted(range(len(arrival_names)), key=arrival_names.__getitem__), dtype=np.int64)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        rows = len(self._weights)
+        width = 1 if self.directed else 2
+        src = np.empty(width * rows, dtype=np.int64)
+        dst = np.empty(width * rows, dtype=np.int64)
+        distances = np.empty(width * rows, dtype=np.float64)
+        # Undirected rows become the arcs o -> d and d -> o, in that order,
+        # exactly as from_frame() interleaves them.
+        src[0::width] = rank[np.frombuffer(self._src, dtype=np.int64)]
+        dst[0::width] = rank[np.frombuffer(self._dst, dtype=np.int64)]
+        distances[0::width] = np.frombuffer(self._weights, dtype=np.float64)
+        self._src, self._dst, self._weights = array('q'), array('q'), array('d')
+        if not self.directed:
+            src[1::2], dst[1::2], distances[1::2] = dst[0::2], src[0::2], distances[0::2]
+
+        arc_order = np.argsort(src, kind='stable')
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(order)), out=offsets[1:])
+        del src
+        targets = array('q')
+        targets.frombytes(memoryview(dst[arc_order]).cast('B'))
+        del dst
+        weights = array('d')
+        weights.frombytes(memoryview(distances[arc_order]).cast('B'))
+        del distances, arc_order
+
+        latitudes, longitudes = array('d'), array('d')
+        latitudes.frombytes(memoryview(np.frombuffer(self._latitudes, dtype=np.float64)[order]).cast('B'))
+        longitudes.frombytes(memoryview(np.frombuffer(self._longitudes, dtype=np.float64)[order]).cast('B'))
+        graph = CSRGraph([arrival_names[i] for i in order], array('q', offsets.tobytes()), targets, weights,
+                         directed=self.directed)
+        return graph, latitudes, longitudes
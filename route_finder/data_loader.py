@@ -1,13 +1,61 @@
 from __future__ import annotations
+from typing import Iterator
+
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+COLUMNS = ['Origin', 'Destination', 'Distance', 'Latitude', 'Longitude']
 
 # Loader mirrors the original preprocessing exactly.
 
 def load_dataset(path: str = './east-java-cities-dataset.xlsx') -> pd.DataFrame:
-    df = pd.read_excel(path)
+    if str(path).lower().endswith('.csv'):
+        df = pd.read_csv(path)
+    elif str(path).lower().endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_excel(path)
     df = df.dropna()
     df['Latitude'] = df['Latitude'].astype(str).str.replace(',', '.')
     df['Longitude'] = df['Longitude'].astype(str).str.replace(',', '.')
     df['Latitude'] = pd.to_numeric(df['Latitude'])
     df['Longitude'] = pd.to_numeric(df['Longitude'])
     return df
+
+
+# Streaming variant for large CSV/Parquet edge lists: the same dropna and
+# decimal-comma normalization, applied one chunk at a time.
+
+def iter_edge_chunks(path: str, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    lower = str(path).lower()
+    if lower.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield normalize_chunk(batch.to_pandas())
+    elif lower.endswith('.csv'):
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield normalize_chunk(chunk)
+    else:
+        raise ValueError(f'cannot stream {path}: only .csv and .parquet edge lists are supported')
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk.dropna()[COLUMNS]
+    for column in ('Latitude', 'Longitude'):
+        # Columns that already parsed as numbers have no decimal commas; only
+        # text columns take the astype(str)/replace/to_numeric round trip.
+        if not is_numeric_dtype(chunk[column]):
+            chunk[column] = pd.to_numeric(chunk[column].astype(str).str.replace(',', '.'))
+    return chunk
+
+
+def stream_graph(path: str, chunksize: int = 100_000, directed: bool = False):
+    # Builds (CSRGraph, latitudes, longitudes) from a CSV/Parquet edge list
+    # without materializing the whole table; see csr.CSRBuilder.
+    from .csr import CSRBuilder
+
+    builder = CSRBuilder(directed=directed)
+    for chunk in iter_edge_chunks(path, chunksize):
+        builder.add_chunk(chunk)
+    return builder.build()
@@ -1,16 +1,20 @@
 from __future__ import annotations
-import pandas as pd
-import folium
-from typing import Dict, Hashable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Hashable, List, Tuple
+
+if TYPE_CHECKING:
+    import folium
+
+# folium is imported inside the rendering functions, so loading a network
+# (extract_graph, build_network, base_layer) never pays for it.
+
+DEFAULT_CENTER = (-7.8, 112.8)  # East Java, for networks without coordinates
 
 # === Verbatim-extracted helper logic from the user's original code ===
 
 def extract_graph(df):
     graph = {}
-    for _, row in df.iterrows():
-        origin = row['Origin']
-        destination = row['Destination']
-        distance = row['Distance']
+    # Column-wise instead of df.iterrows(): no per-row Series, same result.
+    for origin, destination, distance in zip(df['Origin'].tolist(), df['Destination'].tolist(), df['Distance'].tolist()):
         if origin not in graph:
             graph[origin] = []
         if destination not in graph:
@@ -20,36 +24,123 @@ def extract_graph(df):
     return graph
 
 
-def visualize_on_map(df, path, visited_edges, city_coords):
-    avg_lat = df['Latitude'].mean()
-    avg_lon = df['Longitude'].mean()
-    m = folium.Map(location=[avg_lat, avg_lon], zoom_start=6)
+def extract_city_coords(df):
+    # Same as {row['Origin']: (row['Latitude'], row['Longitude']) for _, row in df.iterrows()}:
+    # first-seen key order, last-seen coordinates.
+    return dict(zip(df['Origin'].tolist(), zip(df['Latitude'].tolist(), df['Longitude'].tolist())))
 
-    for _, row in df.iterrows():
-        origin = row['Origin']
-        destination = row['Destination']
-        origin_coords = city_coords[origin]
-        dest_coords = city_coords[destination]
 
-        # Default gray color for all routes
-        folium.PolyLine([origin_coords, dest_coords], color='gray', weight=1.5, opacity=0.5).add_to(m)
+def build_network(df):
+    # One column-wise pass producing everything the UI needs from the dataset:
+    # the adjacency list, the city coordinate table and the sorted city list.
+    graph = extract_graph(df)
+    city_coords = extract_city_coords(df)
+    unique_cities = sorted(graph)
+    return graph, city_coords, unique_cities
 
-    if visited_edges:
-        # Highlight visited edges in blue and add step numbers
-        for edge in visited_edges:
-            origin, destination, step = edge
-            origin_coords = city_coords[origin]
-            dest_coords = city_coords[destination]
-            folium.PolyLine([origin_coords, dest_coords], color='blue', weight=2, opacity=0.8).add_to(m)
-            mid_point = [(origin_coords[0] + dest_coords[0]) / 2, (origin_coords[1] + dest_coords[1]) / 2]
-            folium.Marker(mid_point, icon=folium.DivIcon(html=f'<div style="font-size: 10pt; color: blue;">{step}</div>')).add_to(m)
 
+class BaseLayer:
+    # Everything about the map that does not depend on a query: the centre,
+    # every road once as a GeoJSON FeatureCollection and the city markers as
+    # [lat, lon, name] rows. Built once per dataset and reused by every map.
+    def __init__(self, center: Tuple[float, float], roads: dict, cities: List[list]):
+        self.center = center
+        self.roads = roads
+        self.cities = cities
+
+
+def base_layer(df, city_coords) -> BaseLayer:
+    center = (df['Latitude'].mean(), df['Longitude'].mean()) if len(df) else DEFAULT_CENTER
+    roads = {}
+    for origin, destination in zip(df['Origin'].tolist(), df['Destination'].tolist()):
+        # An undirected road listed in both directions is drawn once.
+        roads.setdefault(frozenset((origin, destination)), (city_coords[origin], city_coords[destination]))
+    return BaseLayer(center, _line_collection(roads.values()),
+                     [[lat, lon, str(city)] for city, (lat, lon) in city_coords.items()])
+
+
+def graph_base_layer(graph, city_coords) -> BaseLayer:
+    # base_layer() for a graph without its source table (e.g. a snapshot).
+    # The map is centred on the mean city position (DEFAULT_CENTER when no
+    # city has one); roads whose endpoints have no coordinates are left out.
+    roads = {}
+    for origin in graph:
+        for destination, _ in graph[origin]:
+            if origin in city_coords and destination in city_coords:
+                roads.setdefault(frozenset((origin, destination)), (city_coords[origin], city_coords[destination]))
+    points = list(city_coords.values())
+    if points:
+        center = (sum(lat for lat, _ in points) / len(points), sum(lon for _, lon in points) / len(points))
+    else:
+        center = DEFAULT_CENTER
+    return BaseLayer(center, _line_collection(roads.values()),
+                     [[lat, lon, str(city)] for city, (lat, lon) in city_coords.items()])
+
+
+def base_map(base: BaseLayer) -> folium.Map:
+    # Roads are a single GeoJSON layer drawn on one canvas, and cities go
+    # through FastMarkerCluster, which ships them as one data array instead
+    # of a Marker object each.
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    m = folium.Map(location=list(base.center), zoom_start=6, prefer_canvas=True)
+    folium.GeoJson(base.roads, name='Roads', style_function=_road_style).add_to(m)
+    FastMarkerCluster(base.cities, callback=_CITY_MARKER, name='Cities').add_to(m)
+    return m
+
+
+def route_overlay(path, visited_edges, city_coords) -> folium.FeatureGroup:
+    # The per-query layers: visited edges (step number as tooltip) and the path.
+    # As in the base layer, cities without coordinates are left out.
+    import folium
+
+    overlay = folium.FeatureGroup(name='Route')
+    visited_edges = [edge for edge in visited_edges or () if edge[0] in city_coords and edge[1] in city_coords]
+    if visited_edges:
+        features = _line_collection(
+            ((city_coords[origin], city_coords[destination]) for origin, destination, _ in visited_edges),
+            [{'step': step} for _, _, step in visited_edges],
+        )
+        folium.GeoJson(features, name='Visited edges', style_function=_visited_style,
+                       tooltip=folium.GeoJsonTooltip(fields=['step'], aliases=['Step'])).add_to(overlay)
     if path:
         # Highlight selected path in red
-        path_coords = [city_coords[city] for city in path]
-        folium.PolyLine(path_coords, color='red', weight=4, opacity=0.8).add_to(m)
+        path_coords = [city_coords[city] for city in path if city in city_coords]
+        if path_coords:
+            folium.PolyLine(path_coords, color='red', weight=4, opacity=0.8).add_to(overlay)
+    return overlay
 
-    for city, coords in city_coords.items():
-        folium.Marker(location=coords, popup=city).add_to(m)
 
+def visualize_on_map(df, path, visited_edges, city_coords, base: BaseLayer = None):
+    # Standalone map with the route drawn in; pass a cached `base` to skip
+    # rebuilding the road layer.
+    m = base_map(base or base_layer(df, city_coords))
+    route_overlay(path, visited_edges, city_coords).add_to(m)
     return m
+
+
+_CITY_MARKER = """function (row) {
+    return L.marker(new L.LatLng(row[0], row[1])).bindPopup(row[2]);
+}"""
+
+
+def _road_style(feature):
+    # Default gray color for all routes
+    return {'color': 'gray', 'weight': 1.5, 'opacity': 0.5}
+
+
+def _visited_style(feature):
+    return {'color': 'blue', 'weight': 2, 'opacity': 0.8}
+
+
+def _line_collection(segments, properties=None) -> dict:
+    # GeoJSON wants (lon, lat); folium and city_coords use (lat, lon).
+    features = []
+    for i, (a, b) in enumerate(segments):
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': [[a[1], a[0]], [b[1], b[0]]]},
+            'properties': properties[i] if properties else {},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
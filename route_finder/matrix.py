@@ -0,0 +1,113 @@
+from __future__ import annotations
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from .algorithms.algorithms import shortest_path_tree_csr
+from .csr import CSRGraph
+
+# Origin-destination tables: one full-settle Dijkstra per source instead of one
+# search per (source, target) pair, spread over a process pool.
+#
+# The graph reaches each worker once, through the pool initializer, never with
+# the individual tasks. Under the default fork start method the workers
+# inherit the parent's CSR arrays copy-on-write; under spawn a snapshot-backed
+# graph is re-mapped from its file and any other graph is pickled once per
+# worker.
+
+
+class DistanceMatrix:
+    def __init__(self, graph: CSRGraph, sources: List[Hashable], targets: List[Hashable],
+                 distances: np.ndarray, predecessors: np.ndarray):
+        self.graph = graph
+        self.sources = sources
+        self.targets = targets
+        self.distances = distances        # float64[len(sources), len(targets)], inf = unreachable
+        self.predecessors = predecessors  # int32[len(sources), num_nodes], -1 = none
+        self._source_rows = {name: i for i, name in enumerate(sources)}
+        self._target_columns = {name: j for j, name in enumerate(targets)}
+
+    def cost(self, source: Hashable, target: Hashable) -> float:
+        return float(self.distances[self._source_rows[source], self._target_columns[target]])
+
+    def path(self, source: Hashable, target: Hashable) -> Optional[List[Hashable]]:
+        # Walk the predecessor row of `source` back from `target`.
+        row = self.predecessors[self._source_rows[source]]
+        source_id = self.graph.index[source]
+        node = self.graph.index[target]
+        if node != source_id and row[node] < 0:
+            return None
+        node_ids = [node]
+        while node != source_id:
+            node = int(row[node])
+            node_ids.append(node)
+        names = self.graph.names
+        return [names[i] for i in reversed(node_ids)]
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.distances, index=pd.Index(self.sources, name='Origin'), columns=self.targets)
+
+    def to_csv(self, path: str) -> None:
+        self.to_frame().to_csv(path)
+
+    def to_parquet(self, path: str) -> None:
+        frame = self.to_frame()
+        frame.columns = [str(column) for column in frame.columns]
+        frame.to_parquet(path)
+
+
+def distance_matrix(graph, sources: Optional[Sequence[Hashable]] = None, targets: Optional[Sequence[Hashable]] = None,
+                    workers: Optional[int] = None) -> DistanceMatrix:
+    # `graph` may be a CSRGraph or an adjacency dict from extract_graph.
+    # Sources default to every city and targets default to the sources.
+    # workers=1 computes in-process; None uses one worker per CPU.
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_adjacency(graph)
+    sources = list(graph.names if sources is None else sources)
+    targets = list(sources if targets is None else targets)
+    source_ids = [graph.index[name] for name in sources]
+    target_ids = np.array([graph.index[name] for name in targets], dtype=np.int64)
+
+    distances = np.empty((len(sources), len(targets)), dtype=np.float64)
+    predecessors = np.empty((len(sources), graph.num_nodes), dtype=np.int32)
+    workers = min(workers or os.cpu_count() or 1, len(sources) or 1)
+
+    if workers <= 1:
+        for row, source_id in enumerate(source_ids):
+            distances[row], predecessors[row] = _solve(graph, source_id, target_ids)
+    else:
+        chunk = max(1, math.ceil(len(source_ids) / (workers * 4)))
+        batches = [source_ids[i:i + chunk] for i in range(0, len(source_ids), chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph, target_ids)) as pool:
+            row = 0
+            for batch_distances, batch_predecessors in pool.map(_solve_batch, batches):
+                distances[row:row + len(batch_distances)] = batch_distances
+                predecessors[row:row + len(batch_predecessors)] = batch_predecessors
+                row += len(batch_distances)
+
+    return DistanceMatrix(graph, sources, targets, distances, predecessors)
+
+
+def _solve(graph: CSRGraph, source_id: int, target_ids: np.ndarray):
+    tree_distances, tree_predecessors = shortest_path_tree_csr(graph, source_id)
+    return np.asarray(tree_distances, dtype=np.float64)[target_ids], np.asarray(tree_predecessors, dtype=np.int32)
+
+
+_worker_graph: Optional[CSRGraph] = None
+_worker_targets: Optional[np.ndarray] = None
+
+
+def _init_worker(graph: CSRGraph, target_ids: np.ndarray) -> None:
+    global _worker_graph, _worker_targets
+    _worker_graph = graph
+    _worker_targets = target_ids
+
+
+def _solve_batch(source_ids: List[int]):
+    rows = [_solve(_worker_graph, source_id, _worker_targets) for source_id in source_ids]
+    return np.stack([r[0] for r in rows]), np.stack([r[1] for r in rows])
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import argparse
+import cProfile
+import io
+import pstats
+import random
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Where a routing workload spends its time.
+#
+# PhaseTimer accumulates wall time per named phase (load, build:*, search,
+# render) for the headless API and the UI. profile_call runs one call under
+# cProfile. `python -m route_finder profile` replays random queries through
+# plain named functions, so cProfile output and py-spy flame graphs
+# (`py-spy record -o flame.svg -- python -m route_finder profile ...`)
+# attribute the time to the real search functions.
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.lasts: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.lasts[name] = seconds
+
+    def last(self, name: str) -> Optional[float]:
+        # Duration of the most recent `name` phase; totals are in summary().
+        return self.lasts.get(name)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: {'total': total, 'count': self.counts[name], 'mean': total / self.counts[name]}
+                for name, total in self.totals.items()}
+
+
+def profile_call(func: Callable, *args, sort: str = 'cumulative', limit: int = 25, dump: Optional[str] = None,
+                 **kwargs):
+    # Returns (result, pstats text). `dump` also writes the raw profile for
+    # snakeviz or `python -m pstats`.
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    if dump:
+        profiler.dump_stats(dump)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
+
+
+def run_queries(finder, pairs, algorithm: str) -> Dict[str, int]:
+    # Named loop body for profilers; sums the search counters of all queries.
+    totals: Dict[str, int] = {}
+    for start, goal in pairs:
+        stats = {}
+        finder.route(start, goal, algorithm=algorithm, stats=stats)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def main(argv=None):
+    from .api import ALGORITHMS, RouteFinder
+
+    parser = argparse.ArgumentParser(prog='python -m route_finder profile',
+                                     description='Replay random queries and report counters, phase timings and an '
+                                                 'optional cProfile table.')
+    parser.add_argument('-g', '--graph', default='./east-java-cities-dataset.xlsx',
+                        help='dataset or compiled .graph.bin snapshot (default: %(default)s)')
+    parser.add_argument('-a', '--algorithm', choices=ALGORITHMS, default='dijkstra')
+    parser.add_argument('-n', '--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cprofile', action='store_true', help='run the queries under cProfile')
+    parser.add_argument('--dump', help='write the cProfile data to this file')
+    parser.add_argument('--sort', default='cumulative', help='pstats sort key (default: %(default)s)')
+    parser.add_argument('--limit', type=int, default=25)
+    args = parser.parse_args(argv)
+
+    finder = RouteFinder.from_file(args.graph)
+    rng = random.Random(args.seed)
+    cities = finder.cities
+    pairs = [rng.sample(cities, 2) for _ in range(args.queries)]
+    finder.route(*pairs[0], algorithm=args.algorithm)  # build preprocessing outside the timed loop
+
+    start = time.perf_counter()
+    if args.cprofile or args.dump:
+        totals, table = profile_call(run_queries, finder, pairs, args.algorithm, sort=args.sort, limit=args.limit,
+                                     dump=args.dump)
+    else:
+        totals, table = run_queries(finder, pairs, args.algorithm), None
+    elapsed = time.perf_counter() - start
+
+    print(f'{args.queries} {args.algorithm} queries on {finder.graph!r} in {elapsed:.3f}s '
+          f'({args.queries / elapsed:,.0f} queries/s)')
+    for key, value in sorted(totals.items()):
+        print(f'  {key:<12} {value / args.queries:>12.1f} per query')
+    for name, phase in finder.timings.summary().items():
+        print(f'  {name:<16} {phase["total"] * 1e3:>10.2f} ms over {phase["count"]} call(s)')
+    if table:
+        print(table, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .api import ALGORITHMS, RouteFinder
+from .cache import LRUCache
+
+# Asyncio HTTP routing service on the standard library.
+#
+#     GET /route?from=Bangkalan&to=Malang&algorithm=astar
+#     GET /stats
+#
+# The event loop only parses requests and writes responses. Routes are
+# computed in a worker pool that receives the graph once, through the pool
+# initializer. In front of the pool sit a bounded LRU of finished routes
+# and a table of in-flight computations, so concurrent requests for the
+# same (algorithm, start, end) wait on one computation instead of each
+# starting their own.
+#
+# In-place edits of the graph (update_edge/add_edge/remove_edge) reach the
+# workers with the requests: each task carries the graph version it is for
+# and the change log since the pool started, which a process worker replays
+# on its copy before searching. The LRU then drops only the routes a change
+# can affect, and a result is cached only if the graph is still at the
+# version it was computed for.
+
+MAX_REQUEST_LINE = 8192
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+Route = Tuple[Optional[list], float]
+
+
+class RouteService:
+    def __init__(self, finder: RouteFinder, workers: Optional[int] = None, cache_size: int = 4096,
+                 executor: str = 'process'):
+        if executor not in ('process', 'thread'):
+            raise ValueError(f"unknown executor {executor!r}, expected 'process' or 'thread'")
+        self.finder = finder
+        self.cache: LRUCache[Route] = LRUCache(cache_size)
+        self.computed = 0
+        self.coalesced = 0
+        self.evicted = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._version = finder.graph.version  # the version the cache is valid for
+        self._pool_version = finder.graph.version if executor == 'process' else None
+        self._pending: Tuple[int, list] = (self._version, [])
+        workers = workers or os.cpu_count() or 1
+        if executor == 'process':
+            self.pool: Executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                      initargs=(finder.graph, finder.city_coords))
+        else:
+            # Threads share this process's finder; useful where processes
+            # cannot be spawned, but the GIL serializes the searches.
+            _init_worker(finder.graph, finder.city_coords)
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    async def route(self, start: Hashable, goal: Hashable, algorithm: str = 'dijkstra') -> Tuple[Route, str]:
+        # Returns ((path, cost), source) where source is 'cache', 'coalesced'
+        # or 'computed'.
+        version = self._catch_up()
+        key = (algorithm, start, goal)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, 'cache'
+        flight_key = (version, *key)
+        future = self._in_flight.get(flight_key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), 'coalesced'
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, _route, version, self._worker_changes(version), algorithm, start,
+                                      goal)
+        self._in_flight[flight_key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._in_flight[flight_key]
+        self.computed += 1
+        if self.finder.graph.version == version:
+            self.cache.put(key, result)
+        return result, 'computed'
+
+    def stats(self) -> Dict[str, int]:
+        return {'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses, 'cached': len(self.cache),
+                'evicted': self.evicted, 'computed': self.computed, 'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight), 'graph_version': self.finder.graph.version}
+
+    def _catch_up(self) -> int:
+        # Drops the cached routes that the graph changes since the last
+        # request can affect; returns the current graph version.
+        graph = self.finder.graph
+        if graph.version != self._version:
+            changes = graph.changes_since(self._version)
+            self.finder.refresh()
+            for key, (path, cost) in self.cache.items():
+                if _is_affected(graph, key[1], key[2], path, cost, changes, self._lower_bound):
+                    self.cache.pop(key)
+                    self.evicted += 1
+            self._version = graph.version
+        return graph.version
+
+    def _lower_bound(self, origin: Hashable, destination: Hashable) -> float:
+        # Admissible for the current graph: RouteFinder rebuilds its
+        # haversine bound when a cheaper road breaks it.
+        return self.finder.heuristic(origin, destination)
+
+    def _worker_changes(self, version: int) -> list:
+        # The edits a process worker, which holds the graph as it was when
+        # the pool started, replays to answer at `version`. Thread workers
+        # share the live graph.
+        if self._pool_version is None or version == self._pool_version:
+            return []
+        if self._pending[0] != version:
+            self._pending = (version, self.finder.graph.changes_since(self._pool_version))
+        return self._pending[1]
+
+    async def handle(self, method: str, target: str) -> Tuple[int, dict]:
+        if method != 'GET':
+            return 405, {'error': f'{method} not allowed'}
+        url = urlsplit(target)
+        if url.path == '/stats':
+            return 200, self.stats()
+        if url.path != '/route':
+            return 404, {'error': f'no such endpoint {url.path}'}
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        start, goal = query.get('from'), query.get('to')
+        algorithm = query.get('algorithm', 'dijkstra')
+        if start is None or goal is None:
+            return 400, {'error': "'from' and 'to' are required"}
+        if algorithm not in ALGORITHMS:
+            return 400, {'error': f'unknown algorithm {algorithm!r}, expected one of {", ".join(ALGORITHMS)}'}
+        for city in (start, goal):
+            if city not in self.finder.graph.index:
+                return 404, {'error': f'unknown city {city!r}'}
+        (path, cost), source = await self.route(start, goal, algorithm)
+        return 200, {'from': start, 'to': goal, 'algorithm': algorithm, 'path': path,
+                     'cost': None if cost == math.inf else cost, 'source': source}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 with keep-alive; request bodies are not used and skipped.
+        # The stream limit is MAX_REQUEST_LINE (see serve), so readline()
+        # raises ValueError for any longer request or header line.
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    await _respond(writer, 400, {'error': 'request or header line too long'}, keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                # Bodies are skipped, never used: anything negative or longer
+                # than a request line is refused before it is read.
+                if not 0 <= length <= MAX_REQUEST_LINE:
+                    await _respond(writer, 400, {'error': 'malformed Content-Length'}, keep_alive=False)
+                    break
+                if length:
+                    await reader.readexactly(length)
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await _respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              if version == 'HTTP/1.1' else headers.get('connection', '').lower() == 'keep-alive')
+                try:
+                    status, body = await self.handle(method, target)
+                except Exception as exc:  # report, keep serving other requests
+                    status, body = 500, {'error': f'{type(exc).__name__}: {exc}'}
+                await _respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000, ready=None) -> None:
+        server = await asyncio.start_server(self.serve_connection, host, port, backlog=1024, limit=MAX_REQUEST_LINE)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, body: dict, keep_alive: bool) -> None:
+    payload = json.dumps(body).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(payload)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + payload)
+    await writer.drain()
+
+
+_worker_finder: Optional[RouteFinder] = None
+
+
+def _init_worker(graph, city_coords) -> None:
+    global _worker_finder
+    _worker_finder = RouteFinder(graph, city_coords)
+
+
+def _route(version: int, changes: list, algorithm: str, start: Hashable, goal: Hashable) -> Route:
+    graph = _worker_finder.graph
+    if graph.version < version:
+        graph.apply_changes(changes)
+    path, cost, _ = _worker_finder.route(start, goal, algorithm=algorithm)
+    return path, cost
+
+
+def _is_affected(graph, start: Hashable, goal: Hashable, path, cost: float, changes, lower_bound) -> bool:
+    # Whether a cached route can be wrong after `changes`. A change to an
+    # arc on the path alters its cost. A dearer or removed arc elsewhere
+    # cannot beat it; a cheaper or new arc u -> v can only if
+    # bound(start, u) + weight + bound(v, goal) undercuts the cached cost.
+    index, names = graph.index, graph.names
+    arcs = {(index[a], index[b]) for a, b in zip(path, path[1:])} if path else set()
+    for _, u, v, old, new in changes:
+        if (u, v) in arcs:
+            return True
+        if new < old and (cost == math.inf
+                          or lower_bound(start, names[u]) + new + lower_bound(names[v], goal) < cost):
+            return True
+    return False
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m route_finder serve', description='Serve routes over HTTP.')
+    parser.add_argument('-g', '--graph', default='./east-java-cities-dataset.xlsx',
+                        help='dataset or compiled .graph.bin snapshot (default: %(default)s)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--executor', choices=('process', 'thread'), default='process')
+    parser.add_argument('--cache-size', type=int, default=4096, help='routes kept in the LRU (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    service = RouteService(RouteFinder.from_file(args.graph), workers=args.workers, cache_size=args.cache_size,
+                           executor=args.executor)
+
+    def ready(server):
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f'serving {service.finder.graph!r} on http://{host}:{port}', file=sys.stderr, flush=True)
+
+    # SIGTERM stops the service like Ctrl-C, so the worker pool is shut down
+    # instead of being left running without its parent.
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+from .csr import CSRGraph
+
+# Binary graph snapshot: the node table, CSR adjacency and coordinates of a
+# dataset, stamped with the SHA-256 of the source file it was compiled from.
+#
+# Layout (native byte order, every section 8-byte aligned):
+#   header    magic, format version, flags, node/arc counts, names size, source hash
+#   offsets   int64[num_nodes + 1]
+#   targets   int64[num_arcs]
+#   weights   float64[num_arcs]
+#   latitude  float64[num_nodes]   (NaN for cities without coordinates)
+#   longitude float64[num_nodes]
+#   names     UTF-8, NUL separated
+#
+# load_snapshot() maps the file and casts the numeric sections in place, so
+# opening a snapshot costs one page-in per section instead of a full
+# read_excel + preprocessing pass.
+
+MAGIC = b'EJRFSNAP'
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = '.graph.bin'
+
+_HEADER = struct.Struct('=8sIIQQQ32s')
+_FLAG_DIRECTED = 1
+_FLAG_BIG_ENDIAN = 2
+
+
+class Snapshot:
+    def __init__(self, graph: CSRGraph, latitudes, longitudes, source_hash: bytes, path: Optional[str] = None):
+        self.graph = graph
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.source_hash = source_hash
+        self.path = path
+
+    def city_coords(self) -> Dict[Hashable, Tuple[float, float]]:
+        return {
+            name: (lat, lon)
+            for name, lat, lon in zip(self.graph.names, self.latitudes, self.longitudes)
+            if not math.isnan(lat)
+        }
+
+
+def default_snapshot_path(source: str) -> str:
+    source = Path(source)
+    return str(source.with_name(source.stem + SNAPSHOT_SUFFIX))
+
+
+def hash_file(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def compile_snapshot(source: str, snapshot_path: Optional[str] = None) -> str:
+    from .data_loader import load_dataset, stream_graph
+    from .graph_io import extract_city_coords
+
+    snapshot_path = snapshot_path or default_snapshot_path(source)
+    source_hash = hash_file(source)
+    if str(source).lower().endswith(('.csv', '.parquet')):
+        # Edge lists are compiled chunk by chunk, never as one DataFrame.
+        graph, latitudes, longitudes = stream_graph(source)
+    else:
+        df = load_dataset(source)
+        graph = CSRGraph.from_frame(df)
+        coords = extract_city_coords(df)
+        latitudes = array('d', (coords.get(name, (math.nan, math.nan))[0] for name in graph.names))
+        longitudes = array('d', (coords.get(name, (math.nan, math.nan))[1] for name in graph.names))
+    write_snapshot(snapshot_path, graph, latitudes, longitudes, source_hash)
+    return snapshot_path
+
+
+def write_snapshot(path: str, graph: CSRGraph, latitudes, longitudes, source_hash: bytes) -> None:
+    names = '\0'.join(graph.names).encode('utf-8')
+    flags = (_FLAG_DIRECTED if graph.directed else 0) | (_FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, flags, graph.num_nodes, graph.num_arcs, len(names), source_hash)
+
+    # Write to a temporary file and rename, so concurrent readers never map
+    # a half-written snapshot.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            for section, typecode in ((graph.offsets, 'q'), (graph.targets, 'q'), (graph.weights, 'd'),
+                                      (latitudes, 'd'), (longitudes, 'd')):
+                _pad(f)
+                f.write(memoryview(array(typecode, section)).cast('B'))
+            _pad(f)
+            f.write(names)
+        # mkstemp creates the file 0600; give it the mode open() would have,
+        # so other users and service accounts can map the snapshot.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_header(path: str) -> Optional[tuple]:
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    header = _HEADER.unpack(raw)
+    if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+        return None
+    return header
+
+
+def load_snapshot(path: str) -> Snapshot:
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+
+    magic, version, flags, num_nodes, num_arcs, names_size, source_hash = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a graph snapshot')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'{path} has snapshot format {version}, expected {FORMAT_VERSION}')
+    if bool(flags & _FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError(f'{path} was written with a different byte order')
+
+    position = _HEADER.size
+    sections = []
+    for typecode, count in (('q', num_nodes + 1), ('q', num_arcs), ('d', num_arcs), ('d', num_nodes), ('d', num_nodes)):
+        position = _align(position)
+        end = position + 8 * count
+        sections.append(view[position:end].cast(typecode))
+        position = end
+    position = _align(position)
+    raw_names = bytes(view[position:position + names_size]).decode('utf-8')
+    names = raw_names.split('\0') if num_nodes else []
+
+    offsets, targets, weights, latitudes, longitudes = sections
+    graph = CSRGraph(names, offsets, targets, weights, directed=bool(flags & _FLAG_DIRECTED))
+    graph.snapshot_path = os.path.abspath(path)
+    return Snapshot(graph, latitudes, longitudes, source_hash, path=path)
+
+
+def open_snapshot_graph(path: str) -> CSRGraph:
+    return load_snapshot(path).graph
+
+
+def load_graph(source: str, snapshot_path: Optional[str] = None) -> Snapshot:
+    # Map the snapshot for `source`, recompiling it first when it is missing,
+    # from an older format, or was built from different file contents.
+    snapshot_path = snapshot_path or default_snapshot_path(source)
+    header = read_header(snapshot_path)
+    if header is None or header[-1] != hash_file(source):
+        compile_snapshot(source, snapshot_path)
+    return load_snapshot(snapshot_path)
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _pad(f) -> None:
+    position = f.tell()
+    f.write(b'\0' * (_align(position) - position))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile an edge-list xlsx/CSV/Parquet into a binary graph snapshot.')
+    parser.add_argument('source', help='dataset (.xlsx, .csv or .parquet)')
+    parser.add_argument('-o', '--output', help=f'snapshot path (default: <source stem>{SNAPSHOT_SUFFIX})')
+    args = parser.parse_args(argv)
+    path = compile_snapshot(args.source, args.output)
+    snapshot = load_snapshot(path)
+    print(f'{path}: {snapshot.graph!r}, source sha256 {snapshot.source_hash.hex()[:16]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import argparse
+import csv
+import random
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+from .utils import haversine_km, open_stream
+
+# Synthetic road networks for scaling tests.
+#
+# Cities sit on a rows x cols grid spread over a bounding box, each one
+# jittered inside its cell. Roads join grid neighbours; kind='grid' adds a
+# share of random diagonals, kind='triangulation' splits every cell along its
+# shorter diagonal (a Delaunay-style mesh). Road length is the great-circle
+# length times a detour factor, lower on every `highway_every`-th row and
+# column so the network has a hierarchy of fast and slow roads.
+#
+# Each row draws its coordinates and its roads from two separate random
+# streams, seeded with strings so no (seed, row, stream) triple can share a
+# seed with another.
+#
+# Records are generated row by row and only two rows of coordinates are held
+# at a time, so a network of any size can be streamed straight to disk. Every
+# city is the Origin of at least one record, which is where load_dataset's
+# schema takes its coordinates from.
+
+COLUMNS = ('Origin', 'Destination', 'Distance', 'Latitude', 'Longitude')
+EAST_JAVA_BOUNDS = (-8.8, 111.0, -6.8, 114.6)  # (min lat, min lon, max lat, max lon)
+
+Record = Tuple[str, str, float, float, float]
+
+
+def road_network(rows: int, cols: Optional[int] = None, kind: str = 'grid', seed: int = 0,
+                 bounds: Tuple[float, float, float, float] = EAST_JAVA_BOUNDS, diagonal_prob: float = 0.3,
+                 highway_every: int = 10) -> Iterator[Record]:
+    cols = rows if cols is None else cols
+    if rows < 2 or cols < 2:
+        raise ValueError('a road network needs at least 2 rows and 2 columns')
+    if kind not in ('grid', 'triangulation'):
+        raise ValueError(f"unknown network kind {kind!r}, expected 'grid' or 'triangulation'")
+
+    width = len(str(max(rows, cols) - 1))
+    min_lat, min_lon, max_lat, max_lon = bounds
+    lat_step = (max_lat - min_lat) / rows
+    lon_step = (max_lon - min_lon) / cols
+
+    def name(r, c):
+        return f'R{r:0{width}d}C{c:0{width}d}'
+
+    def row_coords(r):
+        rng = random.Random(f'{seed}:coords:{r}')
+        return [(min_lat + (r + rng.uniform(0.2, 0.8)) * lat_step,
+                 min_lon + (c + rng.uniform(0.2, 0.8)) * lon_step) for c in range(cols)]
+
+    def is_highway(r1, c1, r2, c2):
+        return highway_every > 0 and ((r1 == r2 and r1 % highway_every == 0) or (c1 == c2 and c1 % highway_every == 0))
+
+    current = row_coords(0)
+    for r in range(rows):
+        below = row_coords(r + 1) if r + 1 < rows else None
+        rng = random.Random(f'{seed}:roads:{r}')
+
+        def road(r1, c1, a, r2, c2, b) -> Record:
+            detour = rng.uniform(1.02, 1.1) if is_highway(r1, c1, r2, c2) else rng.uniform(1.15, 1.6)
+            return name(r1, c1), name(r2, c2), round(haversine_km(a, b) * detour, 1), a[0], a[1]
+
+        last_row = below is None
+        for c in range(cols):
+            here = current[c]
+            if c + 1 < cols:
+                if last_row:
+                    # Bottom row: owned by the right-hand city so each one is an Origin.
+                    yield road(r, c + 1, current[c + 1], r, c, here)
+                else:
+                    yield road(r, c, here, r, c + 1, current[c + 1])
+            if r + 2 == rows and c == 0:
+                # The bottom-left city owns its road upwards.
+                yield road(r + 1, 0, below[0], r, 0, here)
+            elif below is not None:
+                yield road(r, c, here, r + 1, c, below[c])
+            if below is not None and c + 1 < cols:
+                if kind == 'triangulation':
+                    if haversine_km(here, below[c + 1]) <= haversine_km(current[c + 1], below[c]):
+                        yield road(r, c, here, r + 1, c + 1, below[c + 1])
+                    else:
+                        yield road(r, c + 1, current[c + 1], r + 1, c, below[c])
+                elif rng.random() < diagonal_prob:
+                    yield road(r, c, here, r + 1, c + 1, below[c + 1])
+        current = below
+
+
+def write_csv(path: str, records: Iterator[Record], decimal_comma: bool = False) -> int:
+    # Streams records to CSV and returns the row count. decimal_comma writes
+    # coordinates as '-7,25' like the bundled spreadsheet does.
+    count = 0
+    with open_stream(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for origin, destination, distance, lat, lon in records:
+            if decimal_comma:
+                lat, lon = repr(lat).replace('.', ','), repr(lon).replace('.', ',')
+            writer.writerow((origin, destination, distance, lat, lon))
+            count += 1
+    return count
+
+
+def to_frame(records: Iterator[Record]):
+    import pandas as pd
+
+    return pd.DataFrame.from_records(list(records), columns=list(COLUMNS))
+
+
+def city_coords(records: List[Record]):
+    # The coordinate table extract_city_coords would build from these records.
+    return {origin: (lat, lon) for origin, _, _, lat, lon in records}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream a synthetic road network as an Origin/Destination/'
+                                                 'Distance/Latitude/Longitude CSV edge list.')
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--cols', type=int)
+    parser.add_argument('--kind', choices=('grid', 'triangulation'), default='grid')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--diagonal-prob', type=float, default=0.3)
+    parser.add_argument('--highway-every', type=int, default=10)
+    parser.add_argument('--decimal-comma', action='store_true', help="write coordinates as '-7,25'")
+    parser.add_argument('-o', '--output', default='-', help='CSV path (default: stdout)')
+    args = parser.parse_args(argv)
+    records = road_network(args.rows, args.cols, kind=args.kind, seed=args.seed,
+                           diagonal_prob=args.diagonal_prob, highway_every=args.highway_every)
+    count = write_csv(args.output, records, decimal_comma=args.decimal_comma)
+    cities = args.rows * (args.cols or args.rows)
+    print(f'{cities} cities, {count} roads', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
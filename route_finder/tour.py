@@ -0,0 +1,210 @@
+from __future__ import annotations
+import math
+from typing import Hashable, List, Optional, Sequence
+
+from .matrix import DistanceMatrix, distance_matrix
+
+# Multi-stop tours: the best order to visit a set of cities.
+#
+# The stop-to-stop costs come from one parallel distance_matrix() call.
+# Up to `exact_limit` stops the order is solved exactly with Held-Karp
+# dynamic programming (O(2^n n^2)); above that a nearest-neighbour tour is
+# improved with 2-opt and Or-opt moves until neither finds a gain. Both
+# moves are evaluated in O(1) from prefix sums of the tour's forward and
+# backward leg costs, so directed (asymmetric) graphs are handled as well.
+#
+# Open tours (round_trip=False) are solved as cycles through a dummy stop
+# that every stop reaches for free and that only leads back to the start.
+
+
+class Tour:
+    def __init__(self, stops: List[Hashable], cost: float, legs: List[tuple], path: List[Hashable],
+                 round_trip: bool, method: str):
+        self.stops = stops          # visiting order, starting at the start city
+        self.cost = cost
+        self.legs = legs            # (from, to, cost) per leg
+        self.path = path            # full road path, for visualize_on_map
+        self.round_trip = round_trip
+        self.method = method        # 'held-karp' or 'nearest-neighbour+2-opt+or-opt'
+
+    def __repr__(self) -> str:
+        kind = 'round trip' if self.round_trip else 'open tour'
+        return f'Tour({len(self.stops)} stops, {kind}, cost {self.cost:g}, {self.method})'
+
+
+def plan_tour(graph, stops: Sequence[Hashable], start: Optional[Hashable] = None, round_trip: bool = True,
+              exact_limit: int = 12, workers: Optional[int] = None,
+              matrix: Optional[DistanceMatrix] = None) -> Tour:
+    # `graph` may be a CSRGraph or an adjacency dict, as for distance_matrix.
+    # The tour starts at `start` (default: the first stop); a precomputed
+    # `matrix` over the stops skips the shortest-path phase.
+    stops = list(dict.fromkeys(stops))
+    start = stops[0] if start is None else start
+    if start not in stops:
+        stops.insert(0, start)
+    else:
+        stops.remove(start)
+        stops.insert(0, start)
+    if matrix is None:
+        for name in stops:
+            if name not in graph:
+                raise KeyError(f'unknown city {name!r}')
+        matrix = distance_matrix(graph, stops, stops, workers=workers)
+    costs = [[matrix.cost(a, b) for b in stops] for a in stops]
+
+    n = len(stops)
+    if n == 1:
+        return Tour(stops, 0, [], [start], round_trip, 'held-karp')
+
+    # Unreachable pairs get a finite penalty so the move arithmetic stays
+    # finite; a tour that still needs one has no feasible order.
+    finite = [c for row in costs for c in row if c != math.inf]
+    penalty = 2 * sum(finite) + 1
+    costs = [[penalty if c == math.inf else c for c in row] for row in costs]
+    if not round_trip:
+        for row in costs:
+            row.append(0.0)
+        costs.append([0.0] + [penalty] * n)
+
+    if len(costs) <= exact_limit:
+        order, method = held_karp(costs), 'held-karp'
+    else:
+        order = improve_tour(costs, nearest_neighbour(costs))
+        method = 'nearest-neighbour+2-opt+or-opt'
+    if not round_trip:
+        dummy = order.index(n)
+        order = order[dummy + 1:] + order[:dummy]
+
+    legs_ids = list(zip(order, order[1:] + ([order[0]] if round_trip else [])))
+    if any(costs[a][b] >= penalty for a, b in legs_ids):
+        raise ValueError('no tour visits every stop: some stops cannot reach each other')
+    legs = [(stops[a], stops[b], costs[a][b]) for a, b in legs_ids]
+    path = [start]
+    for a, b, _ in legs:
+        path.extend(matrix.path(a, b)[1:])
+    return Tour([stops[i] for i in order], sum(cost for _, _, cost in legs), legs, path, round_trip, method)
+
+
+# --- ordering ---------------------------------------------------------------
+# Orders are lists of indices into `costs`, beginning with 0 (the start) and
+# closing back to it.
+
+def tour_cost(costs: List[List[float]], order: List[int]) -> float:
+    return sum(costs[a][b] for a, b in zip(order, order[1:] + order[:1]))
+
+
+def held_karp(costs: List[List[float]]) -> List[int]:
+    # best[mask][j]: cheapest path from 0 through the stops in `mask` (bit
+    # j-1 for stop j) that ends at j.
+    n = len(costs)
+    size = 1 << (n - 1)
+    best = [[math.inf] * n for _ in range(size)]
+    parent = [[0] * n for _ in range(size)]
+    for j in range(1, n):
+        best[1 << (j - 1)][j] = costs[0][j]
+    for mask in range(1, size):
+        row = best[mask]
+        for j in range(1, n):
+            cost_j = row[j]
+            if cost_j == math.inf:
+                continue
+            costs_j = costs[j]
+            for k in range(1, n):
+                bit = 1 << (k - 1)
+                if mask & bit:
+                    continue
+                candidate = cost_j + costs_j[k]
+                if candidate < best[mask | bit][k]:
+                    best[mask | bit][k] = candidate
+                    parent[mask | bit][k] = j
+    full = size - 1
+    last = min(range(1, n), key=lambda j: best[full][j] + costs[j][0])
+    order, mask = [], full
+    while last:
+        order.append(last)
+        mask, last = mask & ~(1 << (last - 1)), parent[mask][last]
+    order.append(0)
+    order.reverse()
+    return order
+
+
+def nearest_neighbour(costs: List[List[float]]) -> List[int]:
+    order = [0]
+    remaining = set(range(1, len(costs)))
+    while remaining:
+        row = costs[order[-1]]
+        nearest = min(remaining, key=lambda j: (row[j], j))
+        order.append(nearest)
+        remaining.remove(nearest)
+    return order
+
+
+def improve_tour(costs: List[List[float]], order: List[int]) -> List[int]:
+    # Alternate 2-opt and Or-opt passes until a full round finds no gain.
+    order = list(order)
+    while True:
+        improved = _two_opt(costs, order)
+        improved = _or_opt(costs, order) or improved
+        if not improved:
+            return order
+
+
+def _prefix_costs(costs, order):
+    # forward[k]: cost of order[0] -> ... -> order[k]; backward[k]: the same
+    # legs driven in the opposite direction.
+    forward, backward = [0.0], [0.0]
+    for a, b in zip(order, order[1:]):
+        forward.append(forward[-1] + costs[a][b])
+        backward.append(backward[-1] + costs[b][a])
+    return forward, backward
+
+
+def _two_opt(costs, order) -> bool:
+    # Reverse order[i..j]; order[0] stays the start.
+    n = len(order)
+    improved = False
+    forward, backward = _prefix_costs(costs, order)
+    epsilon = 1e-9 * (forward[-1] + 1)
+    for i in range(1, n - 1):
+        before = order[i - 1]
+        for j in range(i + 1, n):
+            after = order[(j + 1) % n]
+            first, last = order[i], order[j]
+            delta = (costs[before][last] + (backward[j] - backward[i]) + costs[first][after]
+                     - costs[before][first] - (forward[j] - forward[i]) - costs[last][after])
+            if delta < -epsilon:
+                order[i:j + 1] = reversed(order[i:j + 1])
+                forward, backward = _prefix_costs(costs, order)
+                improved = True
+    return improved
+
+
+def _or_opt(costs, order) -> bool:
+    # Move a run of 1-3 consecutive stops, kept in its direction, to the
+    # cheapest other gap of the tour.
+    n = len(order)
+    improved = False
+    epsilon = 1e-9 * (tour_cost(costs, order) + 1)
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= n:
+            first, last = order[i], order[i + length - 1]
+            before, after = order[i - 1], order[(i + length) % n]
+            removed = costs[before][first] + costs[last][after] - costs[before][after]
+            best_delta, best_gap = -epsilon, None
+            for p in range(n):
+                if i - 1 <= p <= i + length - 1:
+                    continue  # gaps touching the run itself
+                a, b = order[p], order[(p + 1) % n]
+                delta = costs[a][first] + costs[last][b] - costs[a][b] - removed
+                if delta < best_delta:
+                    best_delta, best_gap = delta, p
+            if best_gap is None:
+                i += 1
+                continue
+            run = order[i:i + length]
+            del order[i:i + length]
+            p = best_gap if best_gap < i else best_gap - length
+            order[p + 1:p + 1] = run
+            improved = True
+    return improved
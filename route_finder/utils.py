@@ -1,4 +1,6 @@
 from __future__ import annotations
+import math
+import sys
 import time
 
 # === Verbatim from user's original code ===
@@ -9,3 +11,35 @@ def measure_execution_time(func, *args, repetitions=10):
         func(*args)
     total_time = time.perf_counter() - start_time
     return total_time / repetitions
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(a, b):
+    # Great-circle distance between two (latitude, longitude) pairs in degrees.
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def open_stream(path: str, mode: str = 'r'):
+    # open() for the command-line tools' CSV/JSON files, where '-' means
+    # stdin (read modes) or stdout (write modes), left open on exit.
+    if path != '-':
+        return open(path, mode, newline='')
+    return _StdStream(sys.stdin if 'r' in mode else sys.stdout)
+
+
+class _StdStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __enter__(self):
+        return self.stream
+
+    def __exit__(self, *exc):
+        if self.stream is not sys.stdin:
+            self.stream.flush()
+        return False